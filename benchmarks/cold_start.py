@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Cold-start and memory measurements for the analysis processes.
+
+- imports: wall time and peak RSS of a fresh interpreter importing each
+  script, which is what every spawned process pays before doing any work.
+- pool: time for an AnalysisWorkerPool to bring all its workers up, and
+  each worker's RSS, PSS and USS, per multiprocessing start method. PSS
+  divides shared pages among the processes mapping them, so weights shared
+  copy-on-write show up as PSS well below RSS.
+
+    python benchmarks/cold_start.py --workers 2 --output cold_start.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+IMPORT_PROBE = """
+import resource, sys, time
+sys.path.insert(0, {scripts!r})
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+POOL_PROBE = """
+import asyncio, json, sys, time
+sys.path.insert(0, {repo!r})
+sys.path.insert(0, {bench!r})
+from cold_start import process_memory
+start = time.perf_counter()
+from scripts.worker_pool import AnalysisWorkerPool
+pool = AnalysisWorkerPool(processes={workers})
+pool.start()
+asyncio.run(pool.warm_up())
+ready = time.perf_counter() - start
+pids = sorted(pool._executor._processes)
+memory = [process_memory(pid) for pid in pids]
+pool.shutdown()
+print(json.dumps({{"ready_seconds": ready, "workers": memory}}))
+"""
+
+
+def process_memory(pid):
+    """RSS, PSS and USS of ``pid`` in MB from /proc (Linux only)."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "pid": pid,
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "uss_mb": round(uss / 1024, 1),
+    }
+
+
+def measure_imports(modules, repeat):
+    results = {}
+    for module in modules:
+        code = IMPORT_PROBE.format(scripts=os.path.join(REPO_DIR, "scripts"), module=module)
+        walls, imports, rss = [], [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+            walls.append(time.perf_counter() - start)
+            seconds, maxrss_kb = out.split()
+            imports.append(float(seconds))
+            rss.append(int(maxrss_kb) / 1024)
+        results[module] = {
+            "process_seconds": round(statistics.median(walls), 4),
+            "import_seconds": round(statistics.median(imports), 4),
+            "peak_rss_mb": round(statistics.median(rss), 1),
+        }
+        print(f"import {module:<22} {results[module]['import_seconds']:.3f}s "
+              f"(process {results[module]['process_seconds']:.3f}s, {results[module]['peak_rss_mb']:.0f} MB)",
+              file=sys.stderr)
+    return results
+
+
+def measure_pool(start_method, workers):
+    code = POOL_PROBE.format(repo=REPO_DIR, bench=BENCH_DIR, workers=workers)
+    env = dict(os.environ, ANALYZER_START_METHOD=start_method)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    for key in ("rss_mb", "pss_mb", "uss_mb"):
+        result[f"mean_{key}"] = round(statistics.mean(w[key] for w in result["workers"]), 1)
+    result["ready_seconds"] = round(result["ready_seconds"], 3)
+    print(f"pool {start_method:<11} ready in {result['ready_seconds']:.2f}s, per worker RSS {result['mean_rss_mb']:.0f} MB "
+          f"PSS {result['mean_pss_mb']:.0f} MB USS {result['mean_uss_mb']:.0f} MB", file=sys.stderr)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure process cold start and per-worker memory")
+    parser.add_argument("--modules", nargs="+", default=["fast_video_analysis", "metadata_analysis"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--start-methods", nargs="+", default=["spawn", "forkserver"])
+    parser.add_argument("--output", "-o", help="write results JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count()},
+        "imports": measure_imports(args.modules, args.repeat),
+        "pool": {},
+    }
+    if sys.platform.startswith("linux"):
+        report["pool"] = {method: measure_pool(method, args.workers) for method in args.start_methods}
+    else:
+        print("Per-worker memory needs /proc; skipping pool measurements", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Offline stand-ins for the network and model dependencies of the pipelines.
+
+Each fake keeps the interface the analyzers already call (``yt_dlp.YoutubeDL``,
+``YouTubeTranscriptApi``, an OpenAI-compatible ``/chat/completions`` endpoint,
+Whisper ``transcribe``) so the code under test runs unmodified.
+"""
+import json
+import os
+import random
+import re
+import shutil
+import threading
+import time
+import urllib.request
+from collections import namedtuple
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SEGMENT_SECONDS = 4
+TOPIC_SECONDS = 60
+TOPICS = [
+    ("audio", "microphones gain preamps compression noise recording levels signal"),
+    ("lighting", "softbox exposure shadows diffusion color temperature bulbs"),
+    ("editing", "timeline cuts transitions pacing render export proxies"),
+    ("cameras", "sensor lenses aperture shutter focus stabilization codecs"),
+    ("publishing", "thumbnails titles upload schedule analytics audience retention"),
+]
+FILLER = "so we will look at how the this and then you can see that it really helps when".split()
+
+TIMESTAMP_RE = re.compile(r"^\[(\d+):(\d{2})(?::(\d{2}))?\]", re.MULTILINE)
+
+
+def synthetic_segments(duration, seconds=SEGMENT_SECONDS):
+    """Deterministic transcript for ``duration`` seconds whose topic changes
+    every ``TOPIC_SECONDS``, so chaptering has real boundaries to find."""
+    segments = []
+    start = 0.0
+    while start < duration:
+        end = min(start + seconds, duration)
+        name, words = TOPICS[int(start // TOPIC_SECONDS) % len(TOPICS)]
+        rng = random.Random(int(start * 1000))
+        text = ' '.join(rng.choice(FILLER) if rng.random() < 0.5 else rng.choice(words.split()) for _ in range(12))
+        segments.append({'start': start, 'end': end, 'text': f" {name} {text}"})
+        start = end
+    return segments
+
+
+class _ThreadedServer:
+    def __init__(self, handler):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _ThrottledHandler(SimpleHTTPRequestHandler):
+    bytes_per_second = 0
+
+    def copyfile(self, source, outputfile):
+        if not self.bytes_per_second:
+            return super().copyfile(source, outputfile)
+        block = 64 * 1024
+        while True:
+            data = source.read(block)
+            if not data:
+                break
+            outputfile.write(data)
+            time.sleep(len(data) / self.bytes_per_second)
+
+    def log_message(self, *args):
+        pass
+
+
+class MediaServer(_ThreadedServer):
+    """Serves ``directory`` over HTTP, optionally throttled to ``bytes_per_second``
+    to stand in for the CDN."""
+
+    def __init__(self, directory, bytes_per_second=0):
+        handler = type("Handler", (_ThrottledHandler,), {"bytes_per_second": bytes_per_second})
+        super().__init__(partial(handler, directory=directory))
+
+
+class _LLMHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    calls = None
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+        prompt = body['messages'][-1]['content']
+        time.sleep(self.latency)
+        self.calls.append(len(prompt))
+        content = json.dumps({"sections": _sections(prompt)})
+        reply = json.dumps({
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+def _sections(prompt):
+    # One section per topic change in the lines the prompt quotes
+    sections, last_topic = [], None
+    for match in TIMESTAMP_RE.finditer(prompt):
+        h, m, s = match.groups()
+        seconds = int(h) * 3600 + int(m) * 60 + int(s) if s else int(h) * 60 + int(m)
+        line = prompt[match.end():prompt.find('\n', match.end())].split()
+        topic = line[0] if line else ''
+        if topic != last_topic:
+            last_topic = topic
+            sections.append({
+                "start_seconds": seconds,
+                "title": f"All about {topic}",
+                "summary": f"This section covers {topic}.",
+                "main_topic": topic,
+            })
+    return sections
+
+
+class FakeLLMServer(_ThreadedServer):
+    """OpenAI-compatible chat endpoint that answers chapter prompts after
+    ``latency`` seconds; ``calls`` records the prompt length of each request."""
+
+    def __init__(self, latency=0.0):
+        self.calls = []
+        handler = type("Handler", (_LLMHandler,), {"latency": latency, "calls": self.calls})
+        super().__init__(handler)
+
+    @property
+    def base_url(self):
+        return f"{self.url}/v1"
+
+
+FakeMedia = namedtuple("FakeMedia", ["video_id", "duration", "video_url", "audio_url"])
+
+
+class FakeYoutubeDL:
+    """``yt_dlp.YoutubeDL`` replacement resolving ids registered in ``catalog``
+    to the synthetic media on a ``MediaServer``."""
+
+    catalog = {}
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        match = re.search(r"(?:v=|youtu\.be/)([\w-]+)", url)
+        media = self.catalog.get(match.group(1) if match else url)
+        if media is None:
+            raise ValueError(f"Video unavailable: {url}")
+        info = {
+            'id': media.video_id,
+            'title': f"Synthetic benchmark video ({media.duration}s)",
+            'uploader': "benchmark",
+            'channel': "benchmark",
+            'duration': media.duration,
+            'view_count': 0,
+            'upload_date': "20240101",
+            'description': "Generated locally for benchmarking.",
+            'tags': ["benchmark"],
+            'webpage_url': url,
+            'url': media.video_url,
+            'ext': 'mp4',
+            'format_id': '18',
+            'http_headers': {},
+            'formats': [
+                {'format_id': '140', 'url': media.audio_url, 'ext': 'm4a', 'protocol': 'http',
+                 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 96},
+                {'format_id': '18', 'url': media.video_url, 'ext': 'mp4', 'protocol': 'http',
+                 'vcodec': 'avc1', 'acodec': 'mp4a.40.2', 'height': 270, 'fps': 25},
+            ],
+        }
+        return self.process_ie_result(info, download)
+
+    def sanitize_info(self, info):
+        return info
+
+    def process_ie_result(self, info, download=True):
+        if download:
+            path = self.params.get('outtmpl', '%(id)s.%(ext)s') % {'id': info['id'], 'ext': info['ext']}
+            with urllib.request.urlopen(info['url']) as response, open(path, 'wb') as out:
+                shutil.copyfileobj(response, out)
+        return info
+
+
+class _FakeTranscript:
+    def __init__(self, duration):
+        self.duration = duration
+
+    def fetch(self):
+        return [{'text': s['text'], 'start': s['start'], 'duration': s['end'] - s['start']}
+                for s in synthetic_segments(self.duration)]
+
+
+class _FakeTranscriptList:
+    def __init__(self, duration):
+        self.transcript = _FakeTranscript(duration)
+
+    def find_generated_transcript(self, languages):
+        return self.transcript
+
+    def find_transcript(self, languages):
+        return self.transcript
+
+    def __iter__(self):
+        return iter([self.transcript])
+
+
+class FakeTranscriptApi:
+    """``YouTubeTranscriptApi`` replacement; videos without captions raise like
+    the real API does."""
+
+    captions = True
+
+    @classmethod
+    def list_transcripts(cls, video_id):
+        media = FakeYoutubeDL.catalog.get(video_id)
+        if media is None or not cls.captions:
+            raise LookupError(f"No transcripts for {video_id}")
+        return _FakeTranscriptList(media.duration)
+
+
+def _audio_seconds(audio):
+    if isinstance(audio, str):
+        from audio_ingest import SAMPLE_RATE, decode_audio
+        audio = decode_audio(audio)
+    else:
+        from audio_ingest import SAMPLE_RATE
+    return len(audio) / SAMPLE_RATE
+
+
+class FakeWhisperModel:
+    """openai-whisper model stand-in that spends ``rtf`` seconds per second
+    of audio and returns the synthetic transcript for that span."""
+
+    def __init__(self, rtf):
+        self.rtf = rtf
+
+    def _segments(self, audio):
+        seconds = _audio_seconds(audio)
+        time.sleep(seconds * self.rtf)
+        return synthetic_segments(seconds)
+
+    def transcribe(self, audio, fp16=False, language=None):
+        return {'segments': self._segments(audio), 'language': language or 'en'}
+
+
+_FasterSegment = namedtuple("Segment", ["start", "end", "text"])
+
+
+class FakeFasterWhisperModel(FakeWhisperModel):
+    def transcribe(self, audio, language=None, **kwargs):
+        segments = [_FasterSegment(s['start'], s['end'], s['text']) for s in self._segments(audio)]
+        return iter(segments), {'language': language or 'en'}
+
+
+def install_fake_whisper(rtf):
+    """Seed the shared model cache so every tier resolves to a fake model.
+
+    Only in-process transcription sees the fakes; parallel workers would load
+    real models.
+    """
+    import whisper_models
+    from quality_tiers import PINNED_MODEL, TIERS
+    names = {tier.model for tier in TIERS.values()} | {whisper_models.DEFAULT_WHISPER_MODEL, PINNED_MODEL}
+    for name in filter(None, names):
+        for compute_type in ("float32", "int8", "default"):
+            whisper_models._models[("whisper", name, compute_type)] = FakeWhisperModel(rtf)
+            whisper_models._models[("faster_whisper", name, "cpu", compute_type)] = FakeFasterWhisperModel(rtf)
+
+
+def install_fake_youtube(catalog):
+    import yt_dlp
+    import metadata_analysis
+    FakeYoutubeDL.catalog = catalog
+    yt_dlp.YoutubeDL = FakeYoutubeDL
+    metadata_analysis.YouTubeTranscriptApi = FakeTranscriptApi
+
+
+def media_catalog(media_server_url, media_files):
+    """Map synthetic video ids to ``FakeMedia`` for ``{duration: (video, audio)}``."""
+    catalog = {}
+    for duration, (video_path, audio_path) in media_files.items():
+        video_id = f"bench{duration:06d}"
+        catalog[video_id] = FakeMedia(
+            video_id, duration,
+            f"{media_server_url}/{os.path.basename(video_path)}",
+            f"{media_server_url}/{os.path.basename(audio_path)}",
+        )
+    return catalog
@@ -0,0 +1,47 @@
+import os
+import subprocess
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+# Bump when the generated media changes so stale files are regenerated
+MEDIA_VERSION = 2
+SCENE_SECONDS = 15
+WIDTH, HEIGHT, FPS = 480, 270, 25
+
+# Speech-like audio: a 120 Hz voice with a few harmonics, amplitude
+# modulated at a syllable rate, with a 0.6 s pause every 4 s so silence
+# detection has sentence breaks to cut at, and 8 s of dead air at the
+# start of every minute for voice activity detection to skip.
+SPEECH_EXPR = (
+    "(0.5*sin(2*PI*120*t)+0.3*sin(2*PI*240*t)+0.15*sin(2*PI*(600+200*mod(floor(t/4),3))*t))"
+    "*(0.55+0.45*sin(2*PI*4*t))*gt(mod(t,4),0.6)*gte(mod(t,60),8)*0.6"
+)
+# Moving test pattern whose brightness steps every SCENE_SECONDS, giving
+# the key frame detector a cut to find in each scene.
+VIDEO_FILTER = f"eq=brightness='0.25*mod(floor(t/{SCENE_SECONDS}),3)-0.25':eval=frame"
+
+
+def _run(cmd):
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()}")
+
+
+def generate_media(media_dir, duration):
+    """Create (or reuse) a synthetic progressive MP4 and audio-only M4A of
+    ``duration`` seconds in ``media_dir``; returns ``(video_path, audio_path)``."""
+    os.makedirs(media_dir, exist_ok=True)
+    stem = os.path.join(media_dir, f"synthetic-v{MEDIA_VERSION}-{duration}s")
+    video_path, audio_path = f"{stem}.mp4", f"{stem}.m4a"
+    base = [FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error', '-y']
+    if not os.path.exists(video_path):
+        _run(base + [
+            '-f', 'lavfi', '-i', f"testsrc2=size={WIDTH}x{HEIGHT}:rate={FPS}:duration={duration}",
+            '-f', 'lavfi', '-i', f"aevalsrc='{SPEECH_EXPR}':s=44100:d={duration}",
+            '-vf', VIDEO_FILTER, '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac', '-b:a', '96k', '-movflags', '+faststart', '-shortest', f"{stem}.tmp.mp4",
+        ])
+        os.replace(f"{stem}.tmp.mp4", video_path)
+    if not os.path.exists(audio_path):
+        _run(base + ['-i', video_path, '-vn', '-c:a', 'copy', '-movflags', '+faststart', f"{stem}.tmp.m4a"])
+        os.replace(f"{stem}.tmp.m4a", audio_path)
+    return video_path, audio_path
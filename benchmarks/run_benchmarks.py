@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the analysis pipelines.
+
+Generates synthetic videos with ffmpeg, serves them from a local HTTP
+server behind a stubbed yt-dlp, answers chapter prompts from a fake local
+LLM endpoint and, by default, replaces Whisper with a model that costs a
+fixed real-time factor. Each pipeline is timed per stage and end to end
+at several durations and the results are written as JSON; pass
+``--baseline`` to compare against an earlier run.
+
+    python benchmarks/run_benchmarks.py --durations 60 300 --output bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "scripts"))
+sys.path.insert(0, BENCH_DIR)
+
+# Results must come from the pipeline, never from the caches, and runs
+# must not leave media behind in (or pick it up from) the real scratch root
+os.environ["RESULT_CACHE"] = "0"
+os.environ["SEARCH_INDEX"] = "0"
+os.environ["MEDIA_CACHE"] = "0"
+os.environ["YTDL_INFO_TTL_SECONDS"] = "0"
+SCRATCH_DIR = tempfile.mkdtemp(prefix="clipify-benchmark-")
+os.environ["CLIPIFY_SCRATCH_DIR"] = SCRATCH_DIR
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from fakes import FakeLLMServer, FakeTranscriptApi, MediaServer, install_fake_whisper, install_fake_youtube, media_catalog
+from media import FFMPEG_BINARY, generate_media
+
+SCHEMA_VERSION = 1
+PIPELINES = ["fast-stream", "fast-video", "fast-audio", "metadata-captions", "metadata-whisper"]
+DEFAULT_DURATIONS = [60, 300, 900]
+DEFAULT_MEDIA_DIR = os.path.join(
+    os.getenv("CLIPIFY_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "clipify")), "benchmark-media"
+)
+# A stage only counts as regressed when it is both this much slower in
+# relative terms and MIN_REGRESSION_SECONDS slower in absolute terms.
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the video analysis pipelines")
+    parser.add_argument("--durations", type=int, nargs="+", default=DEFAULT_DURATIONS,
+                        help="synthetic video lengths in seconds")
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=PIPELINES)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per pipeline and duration; medians are reported")
+    parser.add_argument("--whisper", choices=["fake", "real"], default="fake",
+                        help="'real' loads the configured Whisper models (they must already be downloaded)")
+    parser.add_argument("--fake-rtf", type=float, default=0.1,
+                        help="seconds the fake Whisper spends per second of audio")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per fake LLM response")
+    parser.add_argument("--bandwidth-mbps", type=float, default=0,
+                        help="throttle the media server (0 = unthrottled)")
+    parser.add_argument("--media-dir", default=DEFAULT_MEDIA_DIR, help="where synthetic media is generated and reused")
+    parser.add_argument("--output", "-o", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="relative slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 when a regression is found")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipelines' own logging")
+    return parser.parse_args(argv)
+
+
+def environment():
+    import numpy
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    try:
+        ffmpeg = subprocess.run([FFMPEG_BINARY, "-version"], capture_output=True, text=True).stdout.split("\n")[0]
+    except OSError:
+        ffmpeg = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "ffmpeg": ffmpeg,
+        "git_commit": commit,
+    }
+
+
+async def run_pipeline(pipeline, media, llm_url):
+    """Analyze one synthetic video and return its timings and output sizes."""
+    url = f"https://www.youtube.com/watch?v={media.video_id}"
+    if pipeline.startswith("fast-"):
+        from fast_video_analysis import FastVideoAnalyzer
+        analyzer = FastVideoAnalyzer(ingest=pipeline.split("-", 1)[1])
+        analyzer.llm = _local_llm(analyzer.llm, llm_url)
+        start = time.perf_counter()
+        try:
+            result = await analyzer.analyze_video(url, media.video_id)
+        finally:
+            analyzer.cleanup()
+    else:
+        from metadata_analysis import EnhancedMetadataAnalyzer
+        FakeTranscriptApi.captions = pipeline == "metadata-captions"
+        analyzer = EnhancedMetadataAnalyzer()
+        analyzer.llm = _local_llm(analyzer.llm, llm_url)
+        start = time.perf_counter()
+        result = await analyzer.analyze_video_enhanced(url)
+    wall_seconds = time.perf_counter() - start
+
+    if not result.get("success"):
+        raise RuntimeError(f"{pipeline} failed on {media.duration}s video: {result.get('error')}")
+    stats = result.get("stats") or {}
+    return {
+        "wall_seconds": round(wall_seconds, 4),
+        "timings": result.get("timings") or {},
+        "transcript_segments": len(result.get("transcript") or []),
+        "frames": len(result.get("frames") or result.get("keyFrames") or []),
+        "chapters": len(result.get("chapters") or []),
+        "real_time_factor": stats.get("real_time_factor"),
+        "vad_skipped_fraction": stats.get("vad_skipped_fraction"),
+    }
+
+
+def _local_llm(client, llm_url):
+    from llm_client import get_llm_client
+    return get_llm_client(llm_url, "benchmark", client.model)
+
+
+def summarize(runs):
+    stages = sorted({stage for run in runs for stage in run["timings"]})
+    return {
+        "wall_seconds": round(statistics.median(run["wall_seconds"] for run in runs), 4),
+        "timings": {
+            stage: round(statistics.median(run["timings"].get(stage, 0.0) for run in runs), 4)
+            for stage in stages
+        },
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """Median-to-median comparison of every shared (pipeline, duration, metric)."""
+    previous = {(entry["pipeline"], entry["duration"]): entry["median"] for entry in baseline["results"]}
+    rows = []
+    for entry in results:
+        before = previous.get((entry["pipeline"], entry["duration"]))
+        if before is None:
+            continue
+        metrics = [("wall_seconds", entry["median"]["wall_seconds"], before["wall_seconds"])]
+        metrics += [
+            (stage, seconds, before["timings"][stage])
+            for stage, seconds in entry["median"]["timings"].items() if stage in before["timings"]
+        ]
+        for metric, now, then in metrics:
+            ratio = now / then if then else None
+            rows.append({
+                "pipeline": entry["pipeline"],
+                "duration": entry["duration"],
+                "metric": metric,
+                "baseline": then,
+                "current": now,
+                "ratio": round(ratio, 4) if ratio is not None else None,
+                "regression": bool(ratio and ratio > 1 + threshold and now - then > MIN_REGRESSION_SECONDS),
+            })
+    return rows
+
+
+def print_table(results, comparison, out):
+    ratios = {(row["pipeline"], row["duration"], row["metric"]): row for row in comparison}
+    print(f"{'pipeline':<18} {'duration':>8} {'metric':<18} {'median s':>10} {'vs base':>9}", file=out)
+    for entry in results:
+        metrics = [("wall_seconds", entry["median"]["wall_seconds"])] + list(entry["median"]["timings"].items())
+        for metric, seconds in metrics:
+            row = ratios.get((entry["pipeline"], entry["duration"], metric))
+            change = f"{(row['ratio'] - 1) * 100:+.1f}%" if row and row["ratio"] else ""
+            flag = "  REGRESSION" if row and row["regression"] else ""
+            print(f"{entry['pipeline']:<18} {entry['duration']:>8} {metric:<18} {seconds:>10.3f} {change:>9}{flag}",
+                  file=out)
+
+
+async def run_all(args, catalog, llm_url, quiet):
+    results = []
+    for duration in args.durations:
+        media = catalog[f"bench{duration:06d}"]
+        for pipeline in args.pipelines:
+            runs = []
+            for attempt in range(args.repeat):
+                print(f"{pipeline} {duration}s run {attempt + 1}/{args.repeat}", file=sys.__stderr__)
+                with contextlib.redirect_stderr(io.StringIO()) if quiet else contextlib.nullcontext():
+                    runs.append(await run_pipeline(pipeline, media, llm_url))
+            results.append({"pipeline": pipeline, "duration": duration, "runs": runs, "median": summarize(runs)})
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"Generating synthetic media in {args.media_dir}", file=sys.stderr)
+    media_files = {duration: generate_media(args.media_dir, duration) for duration in args.durations}
+
+    import fast_video_analysis  # noqa: F401  (configures logging on import)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    if args.whisper == "fake":
+        install_fake_whisper(args.fake_rtf)
+
+    bytes_per_second = args.bandwidth_mbps * 125_000
+    try:
+        with MediaServer(args.media_dir, bytes_per_second) as media_server, FakeLLMServer(args.llm_latency) as llm:
+            catalog = media_catalog(media_server.url, media_files)
+            install_fake_youtube(catalog)
+            started = time.time()
+            results = asyncio.run(run_all(args, catalog, llm.base_url, quiet=not args.verbose))
+            llm_calls = len(llm.calls)
+    finally:
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+    report = {
+        "schema_version": SCHEMA_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(started)),
+        "environment": environment(),
+        "config": {
+            "durations": args.durations,
+            "pipelines": args.pipelines,
+            "repeat": args.repeat,
+            "whisper": args.whisper,
+            "fake_rtf": args.fake_rtf if args.whisper == "fake" else None,
+            "llm_latency": args.llm_latency,
+            "bandwidth_mbps": args.bandwidth_mbps,
+            "llm_calls": llm_calls,
+        },
+        "results": results,
+    }
+    comparison = compare(results, baseline, args.threshold) if baseline else []
+    if baseline:
+        report["baseline"] = {"created": baseline.get("created"),
+                              "git_commit": baseline.get("environment", {}).get("git_commit")}
+        report["comparison"] = comparison
+
+    print_table(results, comparison, sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    regressions = [row for row in comparison if row["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
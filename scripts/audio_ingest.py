@@ -0,0 +1,232 @@
+import logging
+import os
+import shutil
+import subprocess
+
+import numpy as np
+
+try:
+    from .ytdl_info import extract_info, select_format
+except ImportError:
+    from ytdl_info import extract_info, select_format
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2  # s16le
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+
+def select_audio_format(info):
+    """Pick the smallest audio-only stream from a yt-dlp info dict."""
+    candidates = [
+        f for f in info.get('formats') or []
+        if f.get('url') and f.get('vcodec') == 'none' and f.get('acodec') not in (None, 'none')
+    ]
+    if not candidates:
+        return None
+
+    def _size(f):
+        size = f.get('filesize') or f.get('filesize_approx')
+        if size:
+            return size
+        # Fall back to bitrate when yt-dlp could not estimate the size
+        return (f.get('abr') or f.get('tbr') or 1e9) * (info.get('duration') or 1) * 125
+
+    return min(candidates, key=_size)
+
+
+def select_progressive_format(info, max_height=720):
+    """Pick the best single-file (audio + video) stream no taller than ``max_height``.
+
+    Both the audio and the frames can then be decoded from one URL while it
+    downloads.
+    """
+    candidates = [
+        f for f in info.get('formats') or []
+        if f.get('url') and f.get('vcodec') not in (None, 'none') and f.get('acodec') not in (None, 'none')
+        and (f.get('height') or 0) <= max_height and f.get('protocol', 'https') in ('http', 'https')
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda f: (f.get('ext') == 'mp4', f.get('height') or 0, f.get('tbr') or 0))
+
+
+def resolve_stream(url, proxy=None, select=select_audio_format, format_spec='worstaudio/bestaudio/worst', info=None):
+    """Pick a stream for ``url``, reusing an already extracted ``info`` dict when given."""
+    if info is None:
+        info = extract_info(url, proxy)
+    fmt = select(info) or select_format(info, format_spec, proxy)
+    if not fmt.get('url'):
+        raise ValueError("No stream available")
+    return fmt, info
+
+
+def resolve_audio_stream(url, proxy=None, info=None):
+    return resolve_stream(url, proxy, info=info)
+
+
+def ffmpeg_input_args(source, headers=None, proxy=None):
+    cmd = [FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error']
+    if source.startswith(('http://', 'https://')):
+        cmd += ['-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5',
+                '-rw_timeout', '30000000']
+        if headers:
+            cmd += ['-headers', ''.join(f"{k}: {v}\r\n" for k, v in headers.items())]
+        if proxy:
+            cmd += ['-http_proxy', proxy]
+    return cmd + ['-i', source]
+
+
+def _ffmpeg_command(source, headers=None, proxy=None, tee=None):
+    cmd = ffmpeg_input_args(source, headers, proxy) + [
+        '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', 'pipe:1'
+    ]
+    if tee:
+        # Second output: the source's own audio/video streams, unmodified,
+        # so the bytes fetched once can be cached for the next analysis
+        cmd += ['-map', '0:v?', '-map', '0:a?', '-c', 'copy', '-y', tee]
+    return cmd
+
+
+def _iter_blocks(pipe, block_bytes, align=1):
+    pending = b''
+    while True:
+        data = pipe.read(block_bytes)
+        if not data:
+            break
+        data = pending + data
+        usable = len(data) - len(data) % align
+        pending = data[usable:]
+        if usable:
+            yield data[:usable]
+
+
+def _check_ffmpeg():
+    if shutil.which(FFMPEG_BINARY) is None:
+        raise RuntimeError(f"{FFMPEG_BINARY} not found on PATH")
+
+
+def _wait_ffmpeg(process):
+    process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {process.stderr.read().decode(errors='replace').strip()}")
+
+
+def _close_ffmpeg(process):
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+    process.stdout.close()
+    process.stderr.close()
+
+
+def iter_ffmpeg(cmd, block_bytes, align=1):
+    """Run ``cmd`` and yield its stdout in blocks that are multiples of ``align`` bytes."""
+    _check_ffmpeg()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        yield from _iter_blocks(process.stdout, block_bytes, align)
+        _wait_ffmpeg(process)
+    finally:
+        _close_ffmpeg(process)
+
+
+class MediaFanout:
+    """One ffmpeg read of ``source`` feeding two consumers: 16 kHz PCM on
+    stdout and a second output, built from ``video_args``, on its own pipe
+    (plus the optional ``tee`` copy), so a stream is downloaded only once.
+
+    ``pcm`` and ``video`` must be consumed concurrently, from different
+    threads: ffmpeg stops reading the input while either pipe is full.
+    Needs ``pass_fds``, so POSIX only (``SUPPORTED``).
+    """
+
+    SUPPORTED = os.name == 'posix'
+
+    def __init__(self, source, headers=None, proxy=None, video_args=(), tee=None):
+        _check_ffmpeg()
+        read_fd, write_fd = os.pipe()
+        cmd = _ffmpeg_command(source, headers, proxy, tee) + list(video_args) + [f'pipe:{write_fd}']
+        try:
+            self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                            pass_fds=(write_fd,))
+        except BaseException:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        self._video = os.fdopen(read_fd, 'rb')
+
+    def pcm(self, chunk_seconds=30):
+        chunk_bytes = int(chunk_seconds * SAMPLE_RATE) * BYTES_PER_SAMPLE
+        try:
+            for data in _iter_blocks(self.process.stdout, chunk_bytes, BYTES_PER_SAMPLE):
+                yield np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+            _wait_ffmpeg(self.process)
+        finally:
+            _close_ffmpeg(self.process)
+
+    def video(self, block_bytes, align=1):
+        try:
+            yield from _iter_blocks(self._video, block_bytes, align)
+        finally:
+            # A reader that stops early must not stall the audio: drain to EOF
+            while self._video.read(1 << 16):
+                pass
+            self._video.close()
+
+    def close(self):
+        """Stop ffmpeg when the consumers never ran."""
+        _close_ffmpeg(self.process)
+        self._video.close()
+
+
+def stream_pcm(source, headers=None, proxy=None, chunk_seconds=30, tee=None):
+    """Decode any ffmpeg-readable source to 16 kHz mono float32 PCM chunks.
+
+    Audio is decoded while it downloads; with ``tee`` the source streams are
+    also copied, unmodified, into that file.
+    """
+    chunk_bytes = int(chunk_seconds * SAMPLE_RATE) * BYTES_PER_SAMPLE
+    for data in iter_ffmpeg(_ffmpeg_command(source, headers, proxy, tee), chunk_bytes, BYTES_PER_SAMPLE):
+        yield np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+
+
+def decode_audio(source, headers=None, proxy=None, tee=None):
+    chunks = list(stream_pcm(source, headers, proxy, tee=tee))
+    return np.concatenate(chunks) if chunks else np.zeros(0, np.float32)
+
+
+def load_audio_stream(url, proxy=None, info=None, scratch=None):
+    """Resolve the smallest audio stream for ``url`` and decode it in full.
+
+    With a ``scratch`` space the stream is read from its media cache when
+    this format was downloaded before, and cached for next time otherwise.
+    Returns ``(pcm, stream_info)`` where ``pcm`` is float32 mono at 16 kHz.
+    """
+    fmt, info = resolve_audio_stream(url, proxy, info)
+    video_id, format_id, ext = info.get('id'), fmt.get('format_id'), fmt.get('ext')
+    cached = scratch.get_media(video_id, format_id) if scratch else None
+    if cached:
+        logger.info(f"Decoding cached audio format {format_id} from {cached}")
+        pcm = decode_audio(cached)
+    else:
+        logger.info(f"Streaming audio format {format_id} ({ext}, {fmt.get('abr')} kbps)")
+        tee = scratch.staging_path(f".{ext or 'mka'}") if scratch and scratch.media_cache else None
+        try:
+            pcm = decode_audio(fmt['url'], fmt.get('http_headers') or info.get('http_headers'), proxy, tee)
+            if tee:
+                scratch.put_media(video_id, format_id, tee, ext)
+        finally:
+            if tee and os.path.exists(tee):
+                os.remove(tee)
+    return pcm, {
+        'format_id': format_id,
+        'ext': ext,
+        'abr': fmt.get('abr'),
+        'cached': bool(cached),
+        'bytes': 0 if cached else fmt.get('filesize') or fmt.get('filesize_approx') or 0,
+        'audio_seconds': len(pcm) / SAMPLE_RATE,
+        'info': info,
+    }
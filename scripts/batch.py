@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+# Per-stage concurrency while a batch is pipelined. Transcription stays at one
+# so every video in the batch shares a single resident Whisper model.
+DEFAULT_STAGE_LIMITS = {
+    "download": int(os.getenv("BATCH_DOWNLOAD_CONCURRENCY", "2")),
+    "transcribe": int(os.getenv("BATCH_TRANSCRIBE_CONCURRENCY", "1")),
+    "keyframes": int(os.getenv("BATCH_KEYFRAME_CONCURRENCY", "1")),
+    "chapters": int(os.getenv("BATCH_CHAPTER_CONCURRENCY", "2")),
+}
+# Videos admitted into the pipeline at once; bounds media waiting on disk
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("BATCH_MAX_IN_FLIGHT", "4"))
+# Stage names the metadata pipeline uses for the same kinds of work
+STAGE_ALIASES = {"whisper": "transcribe"}
+
+
+class StageLimits:
+    """Bounded concurrency per pipeline stage, shared by every video in a batch.
+
+    Analyzers wrap each stage in ``limits.slot(name)``; stages without a
+    limit run unbounded.
+    """
+
+    def __init__(self, limits=None):
+        self.limits = dict(DEFAULT_STAGE_LIMITS, **(limits or {}))
+        self._semaphores = {name: asyncio.Semaphore(max(1, n)) for name, n in self.limits.items()}
+
+    @asynccontextmanager
+    async def slot(self, stage):
+        semaphore = self._semaphores.get(STAGE_ALIASES.get(stage, stage))
+        if semaphore is None:
+            yield
+            return
+        async with semaphore:
+            yield
+
+
+def read_urls(args):
+    """URLs from CLI arguments; ``-`` reads stdin and a file path reads one URL per line."""
+    urls = []
+    for arg in args:
+        if arg == "-":
+            urls.extend(sys.stdin.read().splitlines())
+        elif os.path.isfile(arg):
+            with open(arg, encoding="utf-8") as f:
+                urls.extend(f.read().splitlines())
+        else:
+            urls.append(arg)
+    return urls
+
+
+def is_playlist(url):
+    return "list=" in url or "/playlist" in url
+
+
+def expand_playlists(urls, proxy=None):
+    """Replace playlist URLs with the watch URLs of their entries, de-duplicated."""
+    expanded = []
+    for url in urls:
+        url = url.strip()
+        if not url or url.startswith("#"):
+            continue
+        if not is_playlist(url):
+            expanded.append(url)
+            continue
+        opts = {"quiet": True, "no_warnings": True, "extract_flat": "in_playlist", "skip_download": True}
+        if proxy:
+            opts["proxy"] = proxy
+        try:
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                info = ydl.extract_info(url, download=False) or {}
+        except Exception as e:
+            logger.error(f"Playlist expansion failed for {url}: {e}")
+            expanded.append(url)
+            continue
+        entries = info.get("entries") or []
+        logger.info(f"Playlist {url}: {len(entries)} videos")
+        if not entries:
+            expanded.append(url)
+        for entry in entries:
+            if entry and entry.get("id"):
+                expanded.append(entry.get("url") if str(entry.get("url", "")).startswith("http")
+                                else f"https://www.youtube.com/watch?v={entry['id']}")
+    return list(dict.fromkeys(expanded))
+
+
+async def run_batch(urls, analyze_one, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """Analyze ``urls`` concurrently, yielding ``(index, url, result)`` as each finishes.
+
+    ``analyze_one(url)`` is an async callable returning a result dict. Videos
+    are admitted in order, at most ``max_in_flight`` at a time, so with stage
+    limits in place video N+1 downloads while N transcribes and N-1 is
+    chaptered.
+    """
+    admitted = asyncio.Semaphore(max(1, max_in_flight))
+    done = asyncio.Queue()
+
+    async def _run(index, url):
+        async with admitted:
+            try:
+                result = await analyze_one(url)
+            except Exception as e:
+                logger.error(f"Batch item {url} failed: {e}")
+                result = {"success": False, "error": str(e)}
+        await done.put((index, url, result))
+
+    tasks = [asyncio.create_task(_run(i, url)) for i, url in enumerate(urls)]
+    try:
+        for _ in tasks:
+            yield await done.get()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_TOKENS = int(os.getenv("CHAPTER_WINDOW_TOKENS", "3000"))
+DEFAULT_LLM_CONCURRENCY = int(os.getenv("CHAPTER_LLM_CONCURRENCY", "4"))
+# Longest wait for the LLM's chapters before falling back to local
+# segmentation; 0 waits indefinitely
+LLM_TIMEOUT_SECONDS = float(os.getenv("CHAPTER_LLM_TIMEOUT_SECONDS", "120"))
+# Rough English average; good enough to keep windows under the context limit
+CHARS_PER_TOKEN = 4
+MIN_CHAPTER_SECONDS = 30
+
+MAP_SYSTEM_PROMPT = (
+    "You split part of a video transcript into topic sections. "
+    "Always respond with valid JSON."
+)
+
+MAP_PROMPT = """This is {position} of the transcript of "{title}", covering {start} to {end}.
+Each line starts with its [m:ss] timestamp.
+
+{text}
+
+List the distinct topic sections in this part, in order, as JSON:
+{{"sections": [{{"start_seconds": 0, "title": "Short engaging title", "summary": "One sentence about this section", "main_topic": "Key theme"}}]}}
+Use the timestamps above for start_seconds. Do not invent sections outside {start}-{end}."""
+
+
+def format_timestamp(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class WindowBuilder:
+    """Accumulates transcript segments into windows of at most ``max_tokens``.
+
+    ``add`` returns a window as soon as the next segment would overflow it.
+    """
+
+    def __init__(self, max_tokens=DEFAULT_WINDOW_TOKENS):
+        self.max_tokens = max_tokens
+        self._lines, self._tokens, self._start, self._end = [], 0, None, None
+
+    def add(self, segment):
+        text = segment['text'].strip()
+        if not text:
+            return None
+        line = f"[{format_timestamp(segment['start'])}] {text}"
+        line_tokens = estimate_tokens(line)
+        window = None
+        if self._lines and self._tokens + line_tokens > self.max_tokens:
+            window = {'start': self._start, 'end': segment['start'], 'text': '\n'.join(self._lines)}
+            self._lines, self._tokens, self._start = [], 0, None
+        if self._start is None:
+            self._start = segment['start']
+        self._lines.append(line)
+        self._tokens += line_tokens
+        self._end = segment['end']
+        return window
+
+    def flush(self):
+        if not self._lines:
+            return None
+        window = {'start': self._start, 'end': self._end, 'text': '\n'.join(self._lines)}
+        self._lines, self._tokens, self._start = [], 0, None
+        return window
+
+
+def build_windows(segments, max_tokens=DEFAULT_WINDOW_TOKENS):
+    """Group transcript segments into consecutive windows of at most ``max_tokens``."""
+    builder = WindowBuilder(max_tokens)
+    windows = [window for window in map(builder.add, segments) if window]
+    last = builder.flush()
+    return windows + [last] if last else windows
+
+
+def parse_json_response(content):
+    content = content.strip()
+    if content.startswith('```'):
+        content = content.split('```')[1]
+        if content.startswith('json'):
+            content = content[4:]
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        match = re.search(r'\{[\s\S]*\}', content)
+        if not match:
+            raise
+        return json.loads(match.group(0))
+
+
+def target_chapter_count(duration):
+    # Roughly one chapter per five minutes, within sane bounds
+    return min(20, max(3, int(duration // 300)))
+
+
+def reduce_sections(sections, duration, max_chapters=None):
+    """Merge per-window sections into contiguous, non-overlapping chapters.
+
+    Sections that start too close together or repeat the previous topic are
+    folded into their predecessor, then the shortest chapters are merged into
+    a neighbour until at most ``max_chapters`` remain.
+    """
+    max_chapters = max_chapters or target_chapter_count(duration)
+    chapters = []
+    for section in sorted(sections, key=lambda s: s['start']):
+        if chapters:
+            previous = chapters[-1]
+            same_topic = section['main_topic'] and section['main_topic'].lower() == previous['main_topic'].lower()
+            if section['start'] - previous['start'] < MIN_CHAPTER_SECONDS or same_topic:
+                continue
+        chapters.append(dict(section))
+    if not chapters:
+        return []
+
+    chapters[0]['start'] = 0.0
+    for current, following in zip(chapters, chapters[1:]):
+        current['end'] = following['start']
+    chapters[-1]['end'] = float(max(duration, chapters[-1]['start']))
+
+    while len(chapters) > max_chapters:
+        i = min(range(len(chapters)), key=lambda k: chapters[k]['end'] - chapters[k]['start'])
+        if i == 0:
+            j = 1
+        elif i == len(chapters) - 1:
+            j = i - 1
+        else:
+            before = chapters[i - 1]['end'] - chapters[i - 1]['start']
+            after = chapters[i + 1]['end'] - chapters[i + 1]['start']
+            j = i - 1 if before <= after else i + 1
+        keep, drop = (j, i) if j < i else (i, j)
+        chapters[keep]['end'] = chapters[drop]['end']
+        del chapters[drop]
+    return chapters
+
+
+async def draft_sections(window, complete, semaphore, title='', part=1, parts=None):
+    """Map step: ask the LLM for the topic sections of one transcript window."""
+    prompt = MAP_PROMPT.format(
+        position=f"part {part} of {parts}" if parts else f"part {part}", title=title or 'Unknown',
+        start=format_timestamp(window['start']), end=format_timestamp(window['end']),
+        text=window['text'],
+    )
+    messages = [
+        {"role": "system", "content": MAP_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+    async with semaphore:
+        try:
+            reply = await complete(messages, 600)
+            found = parse_json_response(reply).get('sections', [])
+        except Exception as e:
+            logger.error(f"Chapter window {part}/{parts or '?'} failed: {e}")
+            found = []
+    sections = []
+    for item in found:
+        try:
+            start = float(item.get('start_seconds', window['start']))
+        except (TypeError, ValueError):
+            continue
+        sections.append({
+            'start': min(max(start, window['start']), window['end']),
+            'title': str(item.get('title') or '').strip(),
+            'summary': str(item.get('summary') or '').strip(),
+            'main_topic': str(item.get('main_topic') or '').strip(),
+        })
+    return sections
+
+
+def _reduce(mapped, windows, duration, max_chapters):
+    sections = [section for window_sections in mapped for section in window_sections if section['title']]
+    logger.info(f"Chapter map: {windows} windows -> {len(sections)} sections")
+    return reduce_sections(sections, duration, max_chapters)
+
+
+async def map_reduce_chapters(segments, complete, title='', duration=None,
+                              window_tokens=DEFAULT_WINDOW_TOKENS, concurrency=DEFAULT_LLM_CONCURRENCY,
+                              max_chapters=None):
+    """Build chapters for an arbitrarily long transcript.
+
+    ``complete(messages, max_tokens)`` is an async callable returning the LLM
+    reply text. Windows are summarized concurrently (at most ``concurrency``
+    calls in flight), so latency stays close to one call per ``concurrency``
+    windows regardless of video length.
+    """
+    windows = build_windows(segments, window_tokens)
+    if not windows:
+        return []
+    duration = duration or windows[-1]['end']
+    semaphore = asyncio.Semaphore(concurrency)
+    mapped = await asyncio.gather(*[
+        draft_sections(window, complete, semaphore, title, i + 1, len(windows))
+        for i, window in enumerate(windows)
+    ])
+    return _reduce(mapped, len(windows), duration, max_chapters)
+
+
+class ChapterDrafter:
+    """Map-reduce chaptering fed while the transcript is still being produced.
+
+    Each window's map call starts as soon as the window is complete, so by
+    the time transcription ends only the last window and the reduce remain.
+    """
+
+    def __init__(self, complete, title='', window_tokens=DEFAULT_WINDOW_TOKENS,
+                 concurrency=DEFAULT_LLM_CONCURRENCY):
+        self.complete = complete
+        self.title = title
+        self._builder = WindowBuilder(window_tokens)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks = []
+        self._last_end = 0.0
+
+    def add(self, segments):
+        for segment in segments:
+            window = self._builder.add(segment)
+            if window:
+                self._start(window)
+
+    def _start(self, window):
+        self._last_end = window['end']
+        self._tasks.append(asyncio.ensure_future(
+            draft_sections(window, self.complete, self._semaphore, self.title, len(self._tasks) + 1)
+        ))
+
+    async def finish(self, duration=None, max_chapters=None):
+        window = self._builder.flush()
+        if window:
+            self._start(window)
+        if not self._tasks:
+            return []
+        mapped = await asyncio.gather(*self._tasks)
+        return _reduce(mapped, len(self._tasks), duration or self._last_end, max_chapters)
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
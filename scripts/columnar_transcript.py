@@ -0,0 +1,66 @@
+from array import array
+from collections.abc import Sequence
+
+
+class ColumnarTranscript(Sequence):
+    """Array-backed transcript.
+
+    Times live in two float arrays and all segment text in one string buffer
+    addressed by offsets; attributes shared by every segment (source,
+    language, is_generated, confidence) are stored once. Segment dicts in the
+    public JSON shape are only built on access or by ``to_segments()`` at the
+    output boundary.
+    """
+
+    def __init__(self, source, language='en', is_generated=False, confidence=1.0):
+        self.source = source
+        self.language = language
+        self.is_generated = is_generated
+        self.confidence = confidence
+        self.starts = array('d')
+        self.ends = array('d')
+        self._offsets = array('L', [0])
+        self._buffer = ''
+        self._pending = []
+
+    def append(self, start, end, text):
+        self.starts.append(start)
+        self.ends.append(end)
+        self._pending.append(text)
+        self._offsets.append(self._offsets[-1] + len(text))
+
+    def _text_buffer(self):
+        if self._pending:
+            self._buffer += ''.join(self._pending)
+            self._pending = []
+        return self._buffer
+
+    def text(self, i):
+        if i < 0:
+            i += len(self)
+        return self._text_buffer()[self._offsets[i]:self._offsets[i + 1]]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('transcript index out of range')
+        start, end = self.starts[i], self.ends[i]
+        return {
+            'text': self.text(i),
+            'start': start,
+            'end': end,
+            'confidence': self.confidence,
+            'duration': end - start,
+            'source': self.source,
+            'language': self.language,
+            'is_generated': self.is_generated,
+        }
+
+    def to_segments(self):
+        return [self[i] for i in range(len(self))]
@@ -0,0 +1,50 @@
+import json
+import time
+
+# Transcript segments per "transcript" event
+TRANSCRIPT_EVENT_BATCH = 50
+
+# Result fields already delivered by their own events
+STREAMED_FIELDS = ("metadata", "transcript", "frames", "keyFrames", "chapters")
+
+
+def emit_transcript(emit, segments, start=0):
+    for offset in range(0, len(segments), TRANSCRIPT_EVENT_BATCH):
+        emit("transcript", {"offset": start + offset, "segments": segments[offset:offset + TRANSCRIPT_EVENT_BATCH]})
+
+
+def replay_events(result, emit, stages=()):
+    """Emit the events a live analysis would have produced for a finished ``result``."""
+    emit("metadata", {"metadata": result.get("metadata", {})})
+    emit_transcript(emit, result.get("transcript", []))
+    emit("keyframes", {"frames": result.get("frames", result.get("keyFrames", []))})
+    emit("chapters", {"chapters": result.get("chapters", [])})
+    for stage in stages:
+        emit("stage", {"stage": stage, "status": "completed"})
+
+
+def result_summary(result):
+    """``result`` without the fields its events already carried."""
+    return {key: value for key, value in result.items() if key not in STREAMED_FIELDS}
+
+
+class NdjsonEventWriter:
+    """``on_event`` callback writing each event to ``out`` as one JSON line,
+    in the same ``{"seq", "event", "data", "time"}`` shape as the server's
+    job event stream."""
+
+    def __init__(self, out, ensure_ascii=False):
+        self.out = out
+        self.ensure_ascii = ensure_ascii
+        self.seq = 0
+
+    def __call__(self, event, data):
+        line = json.dumps({"seq": self.seq, "event": event, "data": data, "time": time.time()},
+                          ensure_ascii=self.ensure_ascii)
+        self.out.write(line + "\n")
+        self.out.flush()
+        self.seq += 1
+
+    def finish(self, result):
+        # The last line: success, error, timings and stats
+        self("result", result_summary(result))
@@ -643,17 +643,55 @@
 #     asyncio.run(main())
 import asyncio
 import os
-import tempfile
-import yt_dlp
-import whisper
-import cv2
-import requests
+from collections import deque
 import json
+import re
 import sys
 import unicodedata
 import logging
 import time  # Added import
 
+try:
+    from .audio_ingest import (SAMPLE_RATE, MediaFanout, decode_audio, load_audio_stream, resolve_stream,
+                              select_progressive_format, stream_pcm)
+    from .batch import StageLimits, expand_playlists, read_urls, run_batch
+    from .chaptering import LLM_TIMEOUT_SECONDS, ChapterDrafter, map_reduce_chapters
+    from .event_stream import NdjsonEventWriter, emit_transcript, replay_events
+    from .keyframes import extract_scene_keyframes, stream_frame_args, stream_scene_keyframes
+    from .llm_client import get_llm_client
+    from .metrics import StageTimer
+    from .parallel_transcribe import (DEFAULT_TRANSCRIBE_WORKERS, PcmChunker, append_chunk,
+                                     get_parallel_transcriber, transcribe_chunk_with)
+    from .result_cache import get_result_cache, is_cacheable
+    from .scratch_space import get_scratch_space
+    from .search_index import get_search_index
+    from .stdio_server import StdioServer, claim_stdout
+    from .topic_segmentation import cohesion_sections
+    from .vad import detect_speech
+    from .quality_tiers import cached_tier_current, choose_tier, record_rtf, tier_degraded, tier_setting
+    from .whisper_models import compute_type_in_use, get_whisper_model
+    from .ytdl_info import download_info, extract_info, select_format
+except ImportError:
+    from audio_ingest import (SAMPLE_RATE, MediaFanout, decode_audio, load_audio_stream, resolve_stream,
+                              select_progressive_format, stream_pcm)
+    from batch import StageLimits, expand_playlists, read_urls, run_batch
+    from chaptering import LLM_TIMEOUT_SECONDS, ChapterDrafter, map_reduce_chapters
+    from event_stream import NdjsonEventWriter, emit_transcript, replay_events
+    from keyframes import extract_scene_keyframes, stream_frame_args, stream_scene_keyframes
+    from llm_client import get_llm_client
+    from metrics import StageTimer
+    from parallel_transcribe import (DEFAULT_TRANSCRIBE_WORKERS, PcmChunker, append_chunk,
+                                     get_parallel_transcriber, transcribe_chunk_with)
+    from result_cache import get_result_cache, is_cacheable
+    from scratch_space import get_scratch_space
+    from search_index import get_search_index
+    from stdio_server import StdioServer, claim_stdout
+    from topic_segmentation import cohesion_sections
+    from vad import detect_speech
+    from quality_tiers import cached_tier_current, choose_tier, record_rtf, tier_degraded, tier_setting
+    from whisper_models import compute_type_in_use, get_whisper_model
+    from ytdl_info import download_info, extract_info, select_format
+
 # Set UTF-8 encoding for stdout/stderr
 if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
@@ -662,20 +700,118 @@ if sys.platform == "win32":
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever a change alters the shape or content of analysis results so
+# stale cache entries are not served.
+PIPELINE_VERSION = "7"
+
+# "stream" decodes one progressive stream while it downloads, transcribing,
+# scoring frames and drafting chapters as the bytes arrive; "video" downloads
+# the MP4 first; "audio" streams only the smallest audio track straight into
+# Whisper and skips key frames.
+DEFAULT_INGEST = os.getenv("ANALYZER_INGEST", "stream")
+STREAM_FORMAT = 'best[height<=720][ext=mp4]/best[height<=720]/best'
+
+# Stages reported through "stage" events, in pipeline order
+ANALYSIS_STAGES = ["download", "transcribe", "keyframes", "chapters"]
+
+VIDEO_ID_PATTERNS = [
+    r'(?:youtube\.com\/(?:watch\?v=|embed\/|v\/)|youtu\.be\/)([^&\n?#]+)',
+    r'youtube\.com\/watch\?.*v=([^&\n?#]+)',
+]
+
+def cache_version(whisper_model_name=None, ingest=None):
+    return f"fast/{PIPELINE_VERSION}/{tier_setting(whisper_model_name)}/{ingest or DEFAULT_INGEST}"
+
+def extract_video_id(url):
+    for pattern in VIDEO_ID_PATTERNS:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
 class FastVideoAnalyzer:
-    def __init__(self):
+    def __init__(self, whisper_model_name=None, ingest=None, transcribe_workers=None, stage_limits=None,
+                 queue_depth=0):
+        self.whisper_model_name = whisper_model_name
+        # Jobs waiting ahead of this one; the tier policy trades accuracy for
+        # speed when the queue is long.
+        self.queue_depth = queue_depth
+        self.tier = None
+        self.tier_degraded = False
+        self.stage_limits = stage_limits
+        self.ingest = ingest or DEFAULT_INGEST
+        self.transcribe_workers = transcribe_workers or DEFAULT_TRANSCRIBE_WORKERS
         self.groq_api_key = os.getenv("GROQ_API_KEY")
         if not self.groq_api_key:
             raise ValueError("GROQ_API_KEY not found in environment variables.")
-        self.groq_api_url = "https://api.x.ai/v1/chat/completions"
-        self.temp_dir = tempfile.mkdtemp()
-        logger.info(f"Temp directory created: {self.temp_dir}")
+        self.groq_api_url = "https://api.x.ai/v1"
+        self.llm = get_llm_client(self.groq_api_url, self.groq_api_key, "grok-3")
+        self.scratch = get_scratch_space()
+        self.temp_dir = self.scratch.create()
+        logger.info(f"Scratch directory created: {self.temp_dir}")
+        self.metadata = {}
+        self.info = None
+        self._on_event = None
+        self.timer = StageTimer()
+        self.bytes_downloaded = 0
+        self.audio_seconds = 0.0
+        self.model_seconds = 0.0
+        self.vad_seconds = 0.0
+        self.vad_skipped_seconds = 0.0
+        self._model_lock = asyncio.Lock()
+
+    def cache_version(self):
+        return cache_version(self.whisper_model_name, self.ingest)
 
     def _sanitize_text(self, text):
         if not isinstance(text, str):
             text = str(text)
         return unicodedata.normalize('NFKD', text).encode('ascii', 'replace').decode('ascii')
 
+    def _emit(self, event, data):
+        if self._on_event is None:
+            return
+        try:
+            self._on_event(event, data)
+        except Exception as e:
+            logger.error(f"Event listener error: {self._sanitize_text(e)}")
+
+    async def _stage(self, name, coro):
+        if self.stage_limits is not None:
+            # Batch mode: wait for a free slot in this stage first
+            async with self.stage_limits.slot(name):
+                return await self._run_stage(name, coro)
+        return await self._run_stage(name, coro)
+
+    async def _run_stage(self, name, coro):
+        self._emit("stage", {"stage": name, "status": "started"})
+        with self.timer.stage(name):
+            result = await coro
+        self._emit("stage", {"stage": name, "status": "completed"})
+        return result
+
+    def _set_metadata(self, info):
+        self.metadata = {
+            "id": info.get("id", ""),
+            "title": self._sanitize_text(info.get("title") or ""),
+            "author": self._sanitize_text(info.get("uploader") or ""),
+            "channel": self._sanitize_text(info.get("channel") or ""),
+            "duration": info.get("duration") or 0,
+            "view_count": info.get("view_count") or 0,
+            "upload_date": info.get("upload_date") or "",
+            "thumbnail": info.get("thumbnail") or "",
+            "webpage_url": info.get("webpage_url") or "",
+        }
+        self._emit("metadata", {"metadata": self.metadata})
+
+    async def video_info(self, video_url):
+        # Extracted once per analysis and shared by stream resolution, audio
+        # ingest and the full download
+        if self.info is None:
+            self.info = await asyncio.to_thread(extract_info, video_url, os.getenv("SCRAPERAPI_PROXY"))
+            self._set_metadata(self.info)
+        return self.info
+
     async def download_video_optimized(self, video_url, video_id):
         proxy = os.getenv("SCRAPERAPI_PROXY")  # moved here
 
@@ -696,10 +832,20 @@ class FastVideoAnalyzer:
             ydl_opts['proxy'] = proxy
 
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
+            info = await self.video_info(video_url)
+            fmt = await asyncio.to_thread(select_format, info, ydl_opts['format'], proxy)
+            cached = self.scratch.get_media(info.get('id'), fmt.get('format_id'))
+            if cached and self._verify_video(cached):
+                self.audio_seconds = float(self.metadata.get("duration") or 0)
+                logger.info(f"Video reused from media cache: {cached}")
+                return cached
+            self.scratch.evict(fmt.get('filesize') or fmt.get('filesize_approx') or 0)
+            await asyncio.to_thread(download_info, info, ydl_opts)
             video_path = os.path.join(self.temp_dir, 'video.mp4')
             if os.path.exists(video_path) and self._verify_video(video_path):
+                self.bytes_downloaded = os.path.getsize(video_path)
+                self.audio_seconds = float(self.metadata.get("duration") or 0)
+                video_path = self.scratch.put_media(info.get('id'), fmt.get('format_id'), video_path, 'mp4')
                 logger.info(f"Video downloaded: {video_path}")
                 return video_path
             else:
@@ -709,7 +855,220 @@ class FastVideoAnalyzer:
             logger.error(f"Download error: {self._sanitize_text(e)}")
             return None
 
+    async def ingest_audio(self, video_url):
+        proxy = os.getenv("SCRAPERAPI_PROXY")
+        try:
+            info = await self.video_info(video_url)
+            audio, stream = await asyncio.to_thread(load_audio_stream, video_url, proxy, info, self.scratch)
+            self.bytes_downloaded = stream['bytes']
+            self.audio_seconds = stream['audio_seconds']
+            logger.info(f"Audio streamed: {stream['audio_seconds']:.0f}s, format {stream['format_id']} (~{stream['bytes']} bytes)")
+            return audio if len(audio) else None
+        except Exception as e:
+            logger.error(f"Audio ingest error: {self._sanitize_text(e)}")
+            return None
+
+    async def resolve_media(self, video_url):
+        proxy = os.getenv("SCRAPERAPI_PROXY")
+        try:
+            info = await self.video_info(video_url)
+            fmt, info = await asyncio.to_thread(
+                resolve_stream, video_url, proxy, select_progressive_format, STREAM_FORMAT, info
+            )
+        except Exception as e:
+            logger.error(f"Stream resolve error: {self._sanitize_text(e)}")
+            return None
+        media = {
+            "url": fmt['url'],
+            "headers": fmt.get('http_headers') or info.get('http_headers'),
+            "proxy": proxy,
+            "fps": fmt.get('fps'),
+            "key": (info.get('id'), fmt.get('format_id'), fmt.get('ext')),
+            "cached": False,
+        }
+        cached = self.scratch.get_media(info.get('id'), fmt.get('format_id'))
+        if cached:
+            # Decode and scan the earlier download instead of the CDN
+            logger.info(f"Streaming format {fmt.get('format_id')} from media cache: {cached}")
+            media.update(url=cached, headers=None, proxy=None, cached=True)
+            return media
+        self.bytes_downloaded = fmt.get('filesize') or fmt.get('filesize_approx') or 0
+        logger.info(f"Streaming format {fmt.get('format_id')} ({fmt.get('ext')}, {fmt.get('height')}p)")
+        return media
+
+    async def stream_media(self, media, pcm_queue):
+        # Decodes audio in a thread while it downloads; None marks the end
+        loop = asyncio.get_running_loop()
+        video_id, format_id, ext = media["key"]
+        # Keep a copy of the stream for the next analysis of this video
+        tee = None
+        if not media["cached"] and self.scratch.media_cache:
+            tee = os.path.join(self.temp_dir, f"stream.{ext or 'mp4'}")
+
+        shared = media.get("fanout")
+
+        def _download():
+            try:
+                if shared is not None:
+                    # Opened here, once the download stage has its slot, and
+                    # handed to key frame extraction
+                    fanout = MediaFanout(media["url"], media["headers"], media["proxy"], stream_frame_args(), tee)
+                    loop.call_soon_threadsafe(_settle, shared, fanout)
+                    chunks = fanout.pcm()
+                else:
+                    chunks = stream_pcm(media["url"], media["headers"], media["proxy"], tee=tee)
+                for chunk in chunks:
+                    loop.call_soon_threadsafe(pcm_queue.put_nowait, chunk)
+                if tee:
+                    self.scratch.put_media(video_id, format_id, tee, ext)
+            except Exception as e:
+                logger.error(f"Stream download error: {self._sanitize_text(e)}")
+            finally:
+                loop.call_soon_threadsafe(pcm_queue.put_nowait, None)
+                if shared is not None:
+                    loop.call_soon_threadsafe(_settle, shared, None)
+
+        await asyncio.to_thread(_download)
+
+    async def transcribe_stream(self, pcm_queue, drafter):
+        """Transcribe silence-bounded chunks as soon as they have downloaded,
+        emitting segments and feeding the chapter drafter in order."""
+        chunker = PcmChunker()
+        transcript, pending = [], deque()
+
+        async def collect(wait):
+            while pending and (wait or pending[0].done()):
+                try:
+                    segments = await pending.popleft()
+                except Exception as e:
+                    logger.error(f"Chunk transcription error: {self._sanitize_text(e)}")
+                    continue
+                for segment in segments:
+                    segment['text'] = self._sanitize_text(segment['text'])
+                offset = len(transcript)
+                added = append_chunk(transcript, segments)
+                self._emit_transcript(added, offset)
+                drafter.add(added)
+
+        while True:
+            chunk = await pcm_queue.get()
+            if chunk is None:
+                break
+            self.audio_seconds += len(chunk) / SAMPLE_RATE
+            pending.extend(self._submit_speech(pcm, offset) for pcm, offset in chunker.feed(chunk))
+            await collect(wait=False)
+        pending.extend(self._submit_speech(pcm, offset) for pcm, offset in chunker.finish())
+        await collect(wait=True)
+        logger.info(f"Streaming transcription completed: {len(transcript)} segments")
+        return transcript
+
+    def _select_tier(self):
+        # Chosen once per video, after the download stage has the duration
+        if self.tier is None:
+            duration = self.metadata.get("duration")
+            self.tier = choose_tier(duration, self.queue_depth, model_name=self.whisper_model_name)
+            self.tier_degraded = tier_degraded(self.tier, duration, self.queue_depth, model_name=self.whisper_model_name)
+        return self.tier
+
+    def _model(self):
+        tier = self._select_tier()
+        return get_whisper_model(tier.model, tier.compute_type)
+
+    def _parallel_transcriber(self):
+        tier = self._select_tier()
+        return get_parallel_transcriber("whisper", tier.model, self.transcribe_workers, tier.compute_type)
+
+    def _compute_type(self, tier):
+        # What the model really ran with: int8 falls back to float32 when
+        # quantization does not apply. VAD runs only ahead of Whisper, so
+        # the workers are asked only when they transcribed something.
+        if self.transcribe_workers > 1:
+            return self._parallel_transcriber().compute_type_in_use() if self.vad_seconds else tier.compute_type
+        return compute_type_in_use(tier.model, tier.compute_type) or tier.compute_type
+
+    def _detect_speech(self, pcm):
+        speech = detect_speech(pcm)
+        self.vad_seconds += speech.total_seconds
+        self.vad_skipped_seconds += speech.skipped_seconds
+        return speech
+
+    def _submit_speech(self, pcm, offset):
+        # Only the chunk's speech reaches the model; timestamps are mapped back
+        speech = self._detect_speech(pcm)
+        if not len(speech.pcm):
+            return asyncio.ensure_future(asyncio.sleep(0, result=[]))
+        future = self._submit_chunk(speech.pcm, 0.0)
+
+        async def remap():
+            return speech.remap(await future, offset)
+        return asyncio.ensure_future(remap())
+
+    def _submit_chunk(self, pcm, offset):
+        if self.transcribe_workers > 1:
+            return asyncio.wrap_future(self._parallel_transcriber().submit(pcm, offset))
+        return asyncio.ensure_future(self._transcribe_chunk(pcm, offset))
+
+    async def _transcribe_chunk(self, pcm, offset):
+        # One in-process model: chunks queue on the lock in arrival order
+        async with self._model_lock:
+            return await asyncio.to_thread(self._run_model, pcm, offset)
+
+    def _run_model(self, pcm, offset):
+        model = self._model()
+        start = time.perf_counter()
+        try:
+            return transcribe_chunk_with("whisper", model, pcm, offset)
+        finally:
+            self.model_seconds += time.perf_counter() - start
+
+    async def extract_stream_keyframes(self, media):
+        shared = media.get("fanout")
+        try:
+            fanout = None
+            if shared is not None:
+                # Frames come from the download's own ffmpeg read
+                fanout = await shared
+                if fanout is None:
+                    logger.error("Stream download failed before key frames started.")
+                    return []
+            frames = await asyncio.to_thread(
+                stream_scene_keyframes, media["url"], media["headers"], media["proxy"], media["fps"],
+                fanout=fanout,
+            )
+            logger.info(f"Key frames extracted: {len(frames)}")
+            return frames
+        except Exception as e:
+            logger.error(f"Frame extraction error: {self._sanitize_text(e)}")
+            return []
+
+    async def finish_chapters(self, drafter, transcript):
+        try:
+            sections = await asyncio.wait_for(
+                drafter.finish(duration=self.metadata.get("duration") or None), LLM_TIMEOUT_SECONDS or None
+            )
+            chapters = self._format_chapters(sections)
+            logger.info(f"Chapters generated: {len(chapters)}")
+        except asyncio.TimeoutError:
+            drafter.cancel()
+            logger.warning(f"Grok chapter generation timed out after {LLM_TIMEOUT_SECONDS:.0f}s")
+            chapters = []
+        except Exception as e:
+            logger.error(f"Grok chapter generation error: {self._sanitize_text(e)}")
+            chapters = []
+        return chapters or self._cohesion_chapters(transcript)
+
+    def _cohesion_chapters(self, transcript_segments):
+        # Local lexical-cohesion segmentation when the LLM produced nothing
+        try:
+            sections = cohesion_sections(transcript_segments, self.metadata.get("duration") or None)
+        except Exception as e:
+            logger.error(f"Lexical-cohesion chapter error: {self._sanitize_text(e)}")
+            return []
+        logger.info(f"Lexical-cohesion chapters: {len(sections)}")
+        return self._format_chapters(sections)
+
     def _verify_video(self, video_path):
+        import cv2  # only the full-download path needs OpenCV
         try:
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
@@ -725,14 +1084,32 @@ class FastVideoAnalyzer:
             logger.warning("No video file to transcribe.")
             return []
         logger.info(f"Transcribing file: {video_path}")
+        return await asyncio.to_thread(self._transcribe, video_path)
+
+    async def transcribe_audio(self, audio):
+        if audio is None:
+            logger.warning("No audio to transcribe.")
+            return []
+        logger.info(f"Transcribing {len(audio) / 16000:.0f}s of streamed audio")
+        return await asyncio.to_thread(self._transcribe, audio)
+
+    def _transcribe(self, source):
         try:
-            model = whisper.load_model("base")
-            logger.info("Loading Whisper model (base)...")
-            result = model.transcribe(video_path, fp16=False)
-            for segment in result['segments']:
+            audio = decode_audio(source) if isinstance(source, str) else source
+            speech = self._detect_speech(audio)
+            if not len(speech.pcm):
+                segments = []
+            elif self.transcribe_workers > 1:
+                segments = speech.remap(self._parallel_transcriber().transcribe(speech.pcm))
+            else:
+                model = self._model()
+                start = time.perf_counter()
+                segments = speech.remap(model.transcribe(speech.pcm, fp16=False)['segments'])
+                self.model_seconds += time.perf_counter() - start
+            for segment in segments:
                 segment['text'] = self._sanitize_text(segment['text'])
-            logger.info(f"Whisper transcription completed: {len(result['segments'])} segments")
-            return result['segments']
+            logger.info(f"Whisper transcription completed: {len(segments)} segments")
+            return segments
         except Exception as e:
             logger.error(f"Transcription error: {self._sanitize_text(e)}")
             return []
@@ -743,17 +1120,7 @@ class FastVideoAnalyzer:
             return []
         logger.info("Extracting key frames...")
         try:
-            cap = cv2.VideoCapture(video_path)
-            frames = []
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            interval = int(fps * 10)
-            for i in range(0, frame_count, interval):
-                cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-                ret, frame = cap.read()
-                if ret:
-                    frames.append({"frame_index": i, "timestamp": i / fps})
-            cap.release()
+            frames = await asyncio.to_thread(extract_scene_keyframes, video_path)
             logger.info(f"Key frames extracted: {len(frames)}")
             return frames
         except Exception as e:
@@ -761,91 +1128,272 @@ class FastVideoAnalyzer:
             return []
 
     async def generate_chapters(self, transcript_segments):
-        transcript = " ".join([seg['text'] for seg in transcript_segments])
-        if not transcript:
+        if not any(seg['text'].strip() for seg in transcript_segments):
             logger.warning("No transcript available for chapter generation.")
             return []
         logger.info("Generating chapters with Grok...")
-        headers = {
-            "Authorization": f"Bearer {self.groq_api_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": "grok-3",
-            "messages": [
-                {"role": "system", "content": "Generate chapters for the given transcript, including start/end timestamps, titles, main topics, and key points. Return in JSON format."},
-                {"role": "user", "content": self._sanitize_text(transcript)}
-            ],
-            "max_tokens": 500
-        }
+        segments = [{**seg, 'text': self._sanitize_text(seg['text'])} for seg in transcript_segments]
         try:
-            response = requests.post(self.groq_api_url, json=payload, headers=headers)
-            response.raise_for_status()
-            chapters_text = response.json()["choices"][0]["message"]["content"]
-            chapters = json.loads(self._sanitize_text(chapters_text))
+            sections = await asyncio.wait_for(map_reduce_chapters(
+                segments, self.llm.chat,
+                title=self.metadata.get("title", ""),
+                duration=self.metadata.get("duration") or None,
+            ), LLM_TIMEOUT_SECONDS or None)
+            chapters = self._format_chapters(sections)
             logger.info(f"Chapters generated: {len(chapters)}")
-            return chapters
+        except asyncio.TimeoutError:
+            logger.warning(f"Grok chapter generation timed out after {LLM_TIMEOUT_SECONDS:.0f}s")
+            chapters = []
         except Exception as e:
             logger.error(f"Grok chapter generation error: {self._sanitize_text(e)}")
-            return []
+            chapters = []
+        return chapters or self._cohesion_chapters(segments)
 
-    async def analyze_video(self, video_url, video_id):
+    def _format_chapters(self, sections):
+        return [
+            {
+                "id": f"chapter_{i}",
+                "title": self._sanitize_text(section['title']),
+                "start_time": section['start'],
+                "end_time": section['end'],
+                "summary": self._sanitize_text(section['summary']),
+                "main_topic": self._sanitize_text(section['main_topic']),
+            }
+            for i, section in enumerate(sections)
+        ]
+
+    async def analyze_video(self, video_url, video_id, on_event=None):
+        # on_event(event, data) is called as soon as each stage produces output:
+        # "stage" (started/completed), "metadata", "transcript" (batches of
+        # segments), "keyframes" and "chapters".
         logger.info(f"Starting video analysis for Video ID: {self._sanitize_text(video_id)}")
         logger.info("Launching async tasks...")
+        self._on_event = on_event
+        start_time = time.perf_counter()
 
-        video_path = await self.download_video_optimized(video_url, video_id)
-        if not video_path:
-            logger.error("Video download failed.")
-            return {
-                "success": False,
-                "error": "Failed to download video: Content not available",
-                "video_path": None,
-                "transcript": [],
-                "frames": [],
-                "chapters": [],
-                "duration_seconds": 0
-            }
+        media = None
+        if self.ingest == "stream":
+            with self.timer.stage("download"):
+                media = await self.resolve_media(video_url)
+            if media is None:
+                logger.warning("No streamable format, falling back to a full download.")
+
+        if media is not None:
+            video_path = None
+            pcm_queue = asyncio.Queue()
+            drafter = ChapterDrafter(self.llm.chat, title=self.metadata.get("title", ""))
+            keyframes = self.extract_stream_keyframes(media)
+            if MediaFanout.SUPPORTED:
+                # Key frames share the download's single read of the stream.
+                # They keep pace with it instead of waiting for a keyframes
+                # slot, which would stall the audio behind the same read.
+                media["fanout"] = asyncio.get_running_loop().create_future()
+                keyframes_stage = self._run_stage("keyframes", keyframes)
+            else:
+                keyframes_stage = self._stage("keyframes", keyframes)
+            try:
+                _, transcript, frames = await asyncio.gather(
+                    self._stage("download", self.stream_media(media, pcm_queue)),
+                    self._stage("transcribe", self.transcribe_stream(pcm_queue, drafter)),
+                    keyframes_stage,
+                )
+            except BaseException:
+                drafter.cancel()
+                raise
+            if not self.audio_seconds:
+                drafter.cancel()
+                logger.error("Stream download failed.")
+                return self._failure("Failed to stream video: Content not available")
+            self._emit("keyframes", {"frames": frames})
+            chapters = await self._stage("chapters", self.finish_chapters(drafter, transcript))
+        elif self.ingest == "audio":
+            video_path = None
+            audio = await self._stage("download", self.ingest_audio(video_url))
+            if audio is None:
+                logger.error("Audio ingest failed.")
+                return self._failure("Failed to stream audio: Content not available")
+            transcript = await self._stage("transcribe", self.transcribe_audio(audio))
+            self._emit_transcript(transcript)
+            frames = []
+        else:
+            video_path = await self._stage("download", self.download_video_optimized(video_url, video_id))
+            if not video_path:
+                logger.error("Video download failed.")
+                return self._failure("Failed to download video: Content not available")
 
-        transcript_task = self.transcribe_video(video_path)
-        frames_task = self.extract_key_frames(video_path)
-        transcript, frames = await asyncio.gather(transcript_task, frames_task)
-        chapters = await self.generate_chapters(transcript)
+            transcript_task = self._stage("transcribe", self.transcribe_video(video_path))
+            frames_task = self._stage("keyframes", self.extract_key_frames(video_path))
+            transcript, frames = await asyncio.gather(transcript_task, frames_task)
+            self._emit_transcript(transcript)
+            self._emit("keyframes", {"frames": frames})
+        if media is None:
+            chapters = await self._stage("chapters", self.generate_chapters(transcript))
+        self._emit("chapters", {"chapters": chapters})
 
         result = {
             "success": True,
             "video_path": video_path,
+            "metadata": self.metadata,
             "transcript": transcript,
             "frames": frames,
             "chapters": chapters,
-            "duration_seconds": 0  # Updated in main
+            "duration_seconds": time.perf_counter() - start_time,
+            "timings": self.timer.timings,
+            "stats": self._stats(transcript),
         }
         logger.info(f"Analysis completed in {result['duration_seconds']:.1f}s")
         return result
 
+    def _emit_transcript(self, segments, start=0):
+        emit_transcript(self._emit, segments, start)
+
+    def _stats(self, transcript):
+        audio_seconds = self.audio_seconds or (transcript[-1]['end'] if transcript else 0.0)
+        # Time inside the model when it ran in-process; streaming mode's
+        # transcribe stage also spans waiting for the download.
+        transcribe_seconds = self.model_seconds or self.timer.timings.get("transcribe", 0.0)
+        real_time_factor = transcribe_seconds / audio_seconds if audio_seconds else None
+        tier = self._select_tier()
+        record_rtf(tier.name, real_time_factor)
+        return {
+            "bytes_downloaded": self.bytes_downloaded,
+            "audio_seconds": audio_seconds,
+            # Transcription time per second of audio; below 1 is faster than real time
+            "real_time_factor": real_time_factor,
+            # Share of the audio the VAD pre-pass kept away from Whisper
+            "vad_skipped_fraction": self.vad_skipped_seconds / self.vad_seconds if self.vad_seconds else 0.0,
+            "whisper_tier": tier.name,
+            "whisper_model": tier.model,
+            "compute_type": self._compute_type(tier),
+            # Picked for speed because of the queue; such results are not cached
+            "whisper_tier_degraded": self.tier_degraded,
+        }
+
+    def _failure(self, error):
+        return {
+            "success": False,
+            "error": error,
+            "video_path": None,
+            "transcript": [],
+            "frames": [],
+            "chapters": [],
+            "duration_seconds": 0,
+            "timings": self.timer.timings,
+        }
+
     def cleanup(self):
-        try:
-            for file in os.listdir(self.temp_dir):
-                os.remove(os.path.join(self.temp_dir, file))
-            os.rmdir(self.temp_dir)
-            logger.info("Cleaned up temporary files.")
-        except Exception as e:
-            logger.error(f"Cleanup error: {self._sanitize_text(e)}")
+        if not os.path.isdir(self.temp_dir):
+            return
+        with self.timer.stage("cleanup"):
+            try:
+                self.scratch.release(self.temp_dir)
+                logger.info("Cleaned up temporary files.")
+            except Exception as e:
+                logger.error(f"Cleanup error: {self._sanitize_text(e)}")
+
+def _settle(future, value):
+    if not future.done():
+        future.set_result(value)
+
+async def analyze_url(video_url, video_id, stage_limits=None, queue_depth=0, on_event=None):
+    start_time = time.time()
+    # Look the cache up before an analyzer (and its scratch directory) exists
+    cache = get_result_cache()
+    version = cache_version()
+    result = cache.get(video_id, version) if cache else None
+    if result is not None and not cached_tier_current(result):
+        logger.info(f"Cached analysis for {video_id} used a less accurate tier than now applies")
+        result = None
+    if result is not None:
+        logger.info(f"Serving cached analysis for {video_id}")
+        result["cached"] = True
+        if on_event:
+            replay_events(result, on_event, ANALYSIS_STAGES)
+        return result
+    analyzer = FastVideoAnalyzer(stage_limits=stage_limits, queue_depth=queue_depth)
+    try:
+        result = await analyzer.analyze_video(video_url, video_id, on_event)
+        result["duration_seconds"] = time.time() - start_time
+        if cache and is_cacheable(result):
+            cache.put(video_id, version, result)
+        index = get_search_index()
+        if index:
+            # The result is already good; a busy shared index must not fail it
+            try:
+                await asyncio.to_thread(index.add_result, video_id, result)
+            except Exception:
+                logger.warning(f"Search indexing failed for {video_id}", exc_info=True)
+        return result
+    finally:
+        analyzer.cleanup()
+
+async def analyze_batch(args):
+    # One NDJSON line per video, in completion order; nothing else may reach stdout
+    out = claim_stdout()
+    urls = await asyncio.to_thread(expand_playlists, read_urls(args), os.getenv("SCRAPERAPI_PROXY"))
+    logger.info(f"Batch of {len(urls)} videos")
+    stage_limits = StageLimits()
+
+    async def analyze_one(url):
+        video_id = extract_video_id(url)
+        if not video_id:
+            return {"success": False, "error": "Invalid YouTube URL"}
+        return await analyze_url(url, video_id, stage_limits)
+
+    async for index, url, result in run_batch(urls, analyze_one):
+        record = {"index": index, "url": url, "video_id": extract_video_id(url), "result": result}
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+def _preload_model():
+    tier = choose_tier(None)
+    get_whisper_model(tier.model, tier.compute_type)
+
+async def serve():
+    # Resident mode: imports and the Whisper model stay warm across requests,
+    # which share stage limits exactly like a batch
+    stage_limits = StageLimits()
+
+    async def handle(request):
+        url = request.get("url") or ""
+        video_id = request.get("video_id") or extract_video_id(url)
+        if not video_id:
+            return {"success": False, "error": "Invalid YouTube URL"}
+        return await analyze_url(url, video_id, stage_limits, request.get("queue_depth", 0))
+
+    await StdioServer(handle, "fast_video_analysis", preload=_preload_model).serve()
+
+async def analyze_stream(args):
+    # One NDJSON event per line as each stage produces output, then a final
+    # "result" line with the stats instead of one document at the very end
+    writer = NdjsonEventWriter(claim_stdout())
+    try:
+        video_url, video_id = args[0], args[1]
+        result = await analyze_url(video_url, video_id, on_event=writer)
+    except Exception as e:
+        logger.error(f"Main error: {str(e)}")
+        result = {"success": False, "error": str(e)}
+    writer.finish(result)
 
 async def main():
     start_time = time.time()
+    if sys.argv[1:2] == ["--batch"]:
+        await analyze_batch(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["--serve"]:
+        await serve()
+        return
+    if sys.argv[1:2] == ["--stream"]:
+        await analyze_stream(sys.argv[2:])
+        return
     try:
         video_url = sys.argv[1]
         video_id = sys.argv[2]
-        analyzer = FastVideoAnalyzer()
-        result = await analyzer.analyze_video(video_url, video_id)
-        result["duration_seconds"] = time.time() - start_time
+        result = await analyze_url(video_url, video_id)
         print(json.dumps(result, ensure_ascii=False))
     except Exception as e:
         logger.error(f"Main error: {str(e)}")
         print(json.dumps({"success": False, "error": str(e), "video_path": None, "transcript": [], "frames": [], "chapters": [], "duration_seconds": time.time() - start_time}))
-    finally:
-        if 'analyzer' in locals():
-            analyzer.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+
+# Worker processes are forked from a fork server that has already imported
+# the pipeline and loaded the default Whisper model: they start without
+# re-importing anything and share the weights copy-on-write. Falls back to
+# spawn where forkserver is unavailable (Windows).
+START_METHOD = os.getenv("ANALYZER_START_METHOD") or (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+# Imported once in the fork server; names are resolved relative to this
+# package so workers share modules with the parent (scripts.x or x).
+PRELOAD_MODULES = ["worker_pool", "parallel_transcribe", "warm_models"]
+_PACKAGE = __name__.rpartition(".")[0]
+
+
+def preload_modules():
+    return [f"{_PACKAGE}.{name}" if _PACKAGE else name for name in PRELOAD_MODULES]
+
+
+def _export_import_root():
+    # Before Python 3.12 the fork server ignores the parent's sys.path and
+    # silently skips preloads it cannot import, so make them importable
+    # through the environment it inherits.
+    root = os.path.dirname(os.path.abspath(__file__))
+    if _PACKAGE:
+        root = os.path.dirname(root)
+    paths = os.environ.get("PYTHONPATH", "").split(os.pathsep)
+    if root not in paths:
+        os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [root] + paths))
+
+
+def get_mp_context():
+    """Multiprocessing context for every worker pool in the pipeline.
+
+    The fork server is started by the first pool that needs it and is
+    shared by the rest; it is single-threaded, so unlike forking the server
+    process itself this is safe.
+    """
+    context = multiprocessing.get_context(START_METHOD)
+    if START_METHOD == "forkserver":
+        _export_import_root()
+        context.set_forkserver_preload(preload_modules())
+    return context
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+
+class Job:
+    def __init__(self, url, video_id, stages):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.video_id = video_id
+        self.status = "queued"
+        self.stages = {name: {"status": "pending"} for name in stages}
+        self.events = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.attached = 0
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed")
+
+    def record(self, event, data):
+        if event == "stage":
+            stage = self.stages.setdefault(data["stage"], {"status": "pending"})
+            stage["status"] = data["status"]
+            stage[f"{data['status']}_at"] = time.time()
+        self.events.append({"seq": len(self.events), "event": event, "data": data, "time": time.time()})
+        asyncio.get_running_loop().create_task(self._notify())
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    def snapshot(self, include_result=True):
+        completed = sum(1 for stage in self.stages.values() if stage["status"] == "completed")
+        snapshot = {
+            "id": self.id,
+            "url": self.url,
+            "video_id": self.video_id,
+            "status": self.status,
+            "progress": 1.0 if self.status == "completed" else completed / len(self.stages) if self.stages else 0.0,
+            "stages": self.stages,
+            "events": len(self.events),
+            "attached": self.attached,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if include_result and self.done:
+            snapshot["result"] = self.result
+        return snapshot
+
+    async def wait(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.done)
+
+    async def stream(self, after=0):
+        """Yield events from ``after`` onwards, waiting for new ones until the job finishes."""
+        position = after
+        while True:
+            while position < len(self.events):
+                yield self.events[position]
+                position += 1
+            if self.done:
+                return
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.events) > position or self.done)
+
+
+class JobManager:
+    """Runs analyses in the background and keeps their progress and output.
+
+    ``runner(url, video_id, emit)`` must be a coroutine function that calls
+    ``emit(event, data)`` as partial results become available and returns the
+    final result dict.
+
+    Submissions for a video that already has a job in flight attach to that
+    job instead of starting a second pipeline (single-flight).
+    """
+
+    def __init__(self, runner, stages, ttl=JOB_TTL_SECONDS):
+        self.runner = runner
+        self.stages = stages
+        self.ttl = ttl
+        self.jobs = {}
+        self.submitted = 0
+        self.coalesced = 0
+        self._active = {}
+        self._tasks = set()
+
+    def submit(self, url, video_id):
+        self._expire()
+        job = self._active.get(video_id)
+        if job is not None:
+            job.attached += 1
+            self.coalesced += 1
+            logger.info(f"Attached to in-flight job {job.id} for {video_id}")
+            return job
+        self.submitted += 1
+        job = Job(url, video_id, self.stages)
+        self.jobs[job.id] = job
+        self._active[video_id] = job
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    async def _run(self, job):
+        job.status = "running"
+        job.record("status", {"status": "running"})
+        try:
+            result = await self.runner(job.url, job.video_id, job.record)
+            job.result = result
+            job.status = "completed" if result.get("success") else "failed"
+            job.error = result.get("error")
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            self._active.pop(job.video_id, None)
+        job.finished_at = time.time()
+        job.record("status", {"status": job.status, "error": job.error})
+
+    def stats(self):
+        started = self.submitted + self.coalesced
+        return {
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "coalesce_rate": self.coalesced / started if started else 0.0,
+            "active": len(self._active),
+        }
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.done and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
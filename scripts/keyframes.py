@@ -0,0 +1,164 @@
+import logging
+import os
+
+import numpy as np
+
+try:
+    from .audio_ingest import ffmpeg_input_args, iter_ffmpeg
+except ImportError:
+    from audio_ingest import ffmpeg_input_args, iter_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_FPS = float(os.getenv("KEYFRAME_SAMPLE_FPS", "2"))
+DEFAULT_SCENE_THRESHOLD = float(os.getenv("KEYFRAME_SCENE_THRESHOLD", "0.3"))
+DEFAULT_MIN_GAP_SECONDS = float(os.getenv("KEYFRAME_MIN_GAP_SECONDS", "2"))
+ANALYSIS_WIDTH = 160
+# Streamed frames are scaled to a fixed 16:9 box; the scores only compare
+# frames of one video with each other, so the aspect ratio does not matter.
+STREAM_ANALYSIS_HEIGHT = 90
+HIST_BINS = 32
+BATCH_SIZE = 64
+
+
+class SceneChangeDetector:
+    """Scores consecutive downscaled grayscale frames in NumPy batches and
+    keeps the ones that start a new scene.
+
+    The score blends the L1 distance between normalized luma histograms
+    (robust to motion) with the mean absolute pixel difference (catches cuts
+    between shots with similar exposure); both are in [0, 1].
+    """
+
+    def __init__(self, threshold=DEFAULT_SCENE_THRESHOLD, min_gap=DEFAULT_MIN_GAP_SECONDS, hist_bins=HIST_BINS):
+        self.threshold = threshold
+        self.min_gap = min_gap
+        self.hist_bins = hist_bins
+        self.keyframes = []
+        self._prev_frame = None
+        self._prev_hist = None
+        self._last_key_time = None
+
+    def _histograms(self, frames):
+        n = len(frames)
+        bins = (frames.reshape(n, -1).astype(np.int32) * self.hist_bins) >> 8
+        bins += np.arange(n, dtype=np.int32)[:, None] * self.hist_bins
+        counts = np.bincount(bins.ravel(), minlength=n * self.hist_bins).reshape(n, self.hist_bins)
+        return counts / counts.sum(axis=1, keepdims=True)
+
+    def feed(self, frames, timestamps, frame_indices):
+        """Process a batch of uint8 frames shaped ``(n, height, width)``."""
+        if len(frames) == 0:
+            return
+        hists = self._histograms(frames)
+        if self._prev_frame is None:
+            prev_frames = np.concatenate([frames[:1], frames[:-1]])
+            prev_hists = np.concatenate([hists[:1], hists[:-1]])
+        else:
+            prev_frames = np.concatenate([self._prev_frame[None], frames[:-1]])
+            prev_hists = np.concatenate([self._prev_hist[None], hists[:-1]])
+
+        hist_dist = 0.5 * np.abs(hists - prev_hists).sum(axis=1)
+        pixel_diff = np.abs(frames.astype(np.int16) - prev_frames).mean(axis=(1, 2)) / 255.0
+        scores = 0.5 * hist_dist + 0.5 * pixel_diff
+        if self._prev_frame is None:
+            scores[0] = 1.0  # the opening frame always starts a scene
+
+        for i in np.flatnonzero(scores >= self.threshold):
+            timestamp = float(timestamps[i])
+            if self._last_key_time is not None and timestamp - self._last_key_time < self.min_gap:
+                continue
+            self._last_key_time = timestamp
+            self.keyframes.append({
+                "frame_index": int(frame_indices[i]),
+                "timestamp": timestamp,
+                "score": round(float(scores[i]), 4),
+            })
+
+        self._prev_frame = frames[-1]
+        self._prev_hist = hists[-1]
+
+
+def _analysis_frame(frame, width=ANALYSIS_WIDTH):
+    import cv2
+    height = max(1, int(frame.shape[0] * width / frame.shape[1]))
+    small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+def extract_scene_keyframes(video_path, sample_fps=DEFAULT_SAMPLE_FPS, threshold=DEFAULT_SCENE_THRESHOLD,
+                            min_gap=DEFAULT_MIN_GAP_SECONDS, batch_size=BATCH_SIZE):
+    """Decode ``video_path`` once, front to back, and return scene-change key frames.
+
+    Frames between samples are only grabbed (demuxed and decoded, never
+    converted), so there is no per-sample seek back to the previous I-frame.
+    """
+    # Imported here: the streaming path decodes with ffmpeg and never needs OpenCV
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, int(round(fps / sample_fps))) if sample_fps > 0 else 1
+    detector = SceneChangeDetector(threshold, min_gap)
+    batch, timestamps, indices = [], [], []
+    index = 0
+    try:
+        while True:
+            if index % step:
+                if not cap.grab():
+                    break
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                batch.append(_analysis_frame(frame))
+                timestamps.append(index / fps)
+                indices.append(index)
+                if len(batch) == batch_size:
+                    detector.feed(np.stack(batch), timestamps, indices)
+                    batch, timestamps, indices = [], [], []
+            index += 1
+        if batch:
+            detector.feed(np.stack(batch), timestamps, indices)
+    finally:
+        cap.release()
+    return detector.keyframes
+
+
+def stream_frame_args(sample_fps=DEFAULT_SAMPLE_FPS):
+    """ffmpeg output options for the sampled gray frames ``stream_scene_keyframes`` scores."""
+    return [
+        '-an', '-vf', f'fps={sample_fps},scale={ANALYSIS_WIDTH}:{STREAM_ANALYSIS_HEIGHT},format=gray',
+        '-f', 'rawvideo', '-pix_fmt', 'gray',
+    ]
+
+
+def stream_scene_keyframes(source, headers=None, proxy=None, fps=None, sample_fps=DEFAULT_SAMPLE_FPS,
+                           threshold=DEFAULT_SCENE_THRESHOLD, min_gap=DEFAULT_MIN_GAP_SECONDS,
+                           batch_size=BATCH_SIZE, fanout=None):
+    """Scene-change key frames from a URL or file that may still be downloading.
+
+    ffmpeg samples, downscales and converts to gray while it reads, so frames
+    are scored as the bytes arrive instead of after the download finishes.
+    With ``fanout`` (a ``MediaFanout`` opened with ``stream_frame_args(sample_fps)``)
+    the frames come from the read that also decodes the audio, and
+    ``source`` is not opened again. ``fps`` is the source frame rate, used
+    to report ``frame_index``.
+    """
+    width, height = ANALYSIS_WIDTH, STREAM_ANALYSIS_HEIGHT
+    frame_bytes = width * height
+    if fanout is not None:
+        blocks = fanout.video(frame_bytes * batch_size, frame_bytes)
+    else:
+        cmd = ffmpeg_input_args(source, headers, proxy) + stream_frame_args(sample_fps) + ['pipe:1']
+        blocks = iter_ffmpeg(cmd, frame_bytes * batch_size, frame_bytes)
+    detector = SceneChangeDetector(threshold, min_gap)
+    sampled = 0
+    for data in blocks:
+        frames = np.frombuffer(data, np.uint8).reshape(-1, height, width)
+        timestamps = (sampled + np.arange(len(frames))) / sample_fps
+        indices = np.round(timestamps * fps).astype(int) if fps else sampled + np.arange(len(frames))
+        detector.feed(frames, timestamps, indices)
+        sampled += len(frames)
+    return detector.keyframes
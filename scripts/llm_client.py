@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE = float(os.getenv("LLM_TIMEOUT_SECONDS", "90"))
+DEFAULT_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+
+class LLMError(Exception):
+    pass
+
+
+class AsyncLLMClient:
+    """Pooled, keep-alive client for OpenAI-compatible chat completion APIs.
+
+    Calls never block the event loop, retry 429/5xx and transport errors with
+    jittered exponential backoff (honouring Retry-After), and give up once the
+    per-call deadline is spent. Cancelling the awaiting task aborts the request.
+    """
+
+    def __init__(self, base_url, api_key, model, deadline=DEFAULT_DEADLINE, max_retries=DEFAULT_MAX_RETRIES):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.model = model
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self._client = None
+        self._loop = None
+
+    def _http(self):
+        # httpx connections belong to the loop that opened them, so a client
+        # used from a new loop is rebuilt and the stale one closed on its own
+        # loop. Pool workers keep one loop for their lifetime, so this only
+        # happens for callers that start a fresh loop per call.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._client is not None:
+                self._close_stale(self._client, self._loop)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS,
+                                    keepalive_expiry=30),
+                timeout=httpx.Timeout(self.deadline, connect=10),
+            )
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    def _close_stale(client, loop):
+        if loop.is_closed():
+            # Its transports went with the loop; the sockets close when the
+            # client is collected.
+            logger.debug("Dropping an LLM client whose event loop has closed")
+            return
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def chat(self, messages, max_tokens, temperature=None, deadline=None):
+        payload = {"model": self.model, "messages": messages, "max_tokens": max_tokens}
+        if temperature is not None:
+            payload["temperature"] = temperature
+        give_up_at = time.monotonic() + (deadline or self.deadline)
+        client = self._http()
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                break
+            retry_after = None
+            try:
+                response = await asyncio.wait_for(client.post("/chat/completions", json=payload), remaining)
+                if response.status_code not in RETRY_STATUSES:
+                    if response.is_error:
+                        raise LLMError(f"LLM request failed ({response.status_code}): {response.text[:200]}")
+                    return response.json()["choices"][0]["message"]["content"]
+                last_error = LLMError(f"LLM request failed ({response.status_code})")
+                retry_after = _retry_after(response)
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                last_error = e
+
+            if retry_after is not None:
+                # The server's wait is a floor: jitter only ever adds to it
+                delay = retry_after + random.uniform(0, BACKOFF_BASE)
+            else:
+                delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+            if attempt == self.max_retries or time.monotonic() + delay >= give_up_at:
+                break
+            logger.warning(f"LLM call attempt {attempt + 1} failed ({last_error!r}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        raise LLMError(f"LLM request gave up: {last_error!r}")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(base_url, api_key, model):
+    key = (base_url, api_key, model)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = AsyncLLMClient(base_url, api_key, model)
+            _clients[key] = client
+    return client
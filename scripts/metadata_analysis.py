@@ -6,38 +6,89 @@ Enhanced Metadata-Only Video Analysis with YouTube Transcript API
 import sys
 import json
 import asyncio
+import logging
 import os
 import time
 import re
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from pathlib import Path
-import tempfile
 
 # Core dependencies
-import yt_dlp
 from youtube_transcript_api import YouTubeTranscriptApi
-from faster_whisper import WhisperModel
-from groq import Groq
+
+try:
+    from .batch import StageLimits, expand_playlists, read_urls, run_batch
+    from .chaptering import LLM_TIMEOUT_SECONDS, map_reduce_chapters
+    from .columnar_transcript import ColumnarTranscript
+    from .event_stream import NdjsonEventWriter, emit_transcript, replay_events
+    from .llm_client import get_llm_client
+    from .metrics import StageTimer
+    from .transcript_index import TranscriptIndex
+    from .quality_tiers import cached_tier_current, choose_tier, record_rtf, tier_setting
+    from .result_cache import get_result_cache, is_cacheable
+    from .scratch_space import get_scratch_space
+    from .search_index import get_search_index
+    from .stdio_server import StdioServer, claim_stdout
+    from .topic_segmentation import cohesion_sections
+    from .ytdl_info import extract_info
+except ImportError:
+    from batch import StageLimits, expand_playlists, read_urls, run_batch
+    from chaptering import LLM_TIMEOUT_SECONDS, map_reduce_chapters
+    from columnar_transcript import ColumnarTranscript
+    from event_stream import NdjsonEventWriter, emit_transcript, replay_events
+    from llm_client import get_llm_client
+    from metrics import StageTimer
+    from transcript_index import TranscriptIndex
+    from quality_tiers import cached_tier_current, choose_tier, record_rtf, tier_setting
+    from result_cache import get_result_cache, is_cacheable
+    from scratch_space import get_scratch_space
+    from search_index import get_search_index
+    from stdio_server import StdioServer, claim_stdout
+    from topic_segmentation import cohesion_sections
+    from ytdl_info import extract_info
+
+logger = logging.getLogger(__name__)
+
+def _whisper_fallback():
+    """Modules only the Faster-Whisper fallback needs (NumPy, audio decoding,
+    model loading); imported on first use so the caption path never pays for them."""
+    try:
+        from . import audio_ingest, parallel_transcribe, vad, whisper_models
+    except ImportError:
+        import audio_ingest, parallel_transcribe, vad, whisper_models
+    return audio_ingest, parallel_transcribe, vad, whisper_models
+
+# Bump whenever a change alters the shape or content of analysis results so
+# stale cache entries are not served.
+PIPELINE_VERSION = "7"
+
+# Stages every analysis reports through "stage" events; "download" and
+# "whisper" only run when the video has no captions
+ANALYSIS_STAGES = ['metadata', 'transcript_fetch', 'chapters']
 
 class EnhancedMetadataAnalyzer:
-    def __init__(self):
+    def __init__(self, stage_limits: Optional[StageLimits] = None):
         self.whisper_model = None  # Load only if needed
-        self.groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+        self.tier = None
+        # What the Whisper fallback really ran with; set once it has run
+        self.compute_type: Optional[str] = None
+        # Range index over the transcript being chaptered
+        self._index: Optional[TranscriptIndex] = None
+        self._index_source: Optional[List[Dict]] = None
+        self.stage_limits = stage_limits
+        self.timer = StageTimer()
+        self.bytes_downloaded = 0
+        self.audio_seconds = 0.0
+        self.vad_skipped_fraction: Optional[float] = None
+        self.llm = get_llm_client('https://api.groq.com/openai/v1', os.getenv('GROQ_API_KEY'), 'llama-3.3-70b-versatile')
         if not os.getenv('GROQ_API_KEY'):
             raise ValueError("GROQ_API_KEY environment variable is not set")
-        
-        self.ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-            'skip_download': True,
-            'writesubtitles': False,
-            'writeautomaticsub': False,
-            'writeinfojson': False,
-            'writethumbnail': False,
-            'progress': False,
-            'noprogress': True,
-        }
+        # yt-dlp info dict from the metadata stage, reused by the audio fallback
+        self.info: Optional[Dict[str, Any]] = None
+        self._on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+
+    def cache_version(self) -> str:
+        return f"metadata/{PIPELINE_VERSION}/{tier_setting()}"
 
     def clean_text_for_json(self, text: str) -> str:
         if not text:
@@ -48,8 +99,47 @@ class EnhancedMetadataAnalyzer:
         text = re.sub(r'[^\x00-\x7F\u00A0-\u024F\u1E00-\u1EFF\u2000-\u206F\u2070-\u209F\u20A0-\u20CF\u2100-\u214F]', '', text)
         return text.strip()
 
-    async def analyze_video_enhanced(self, youtube_url: str) -> Dict[str, Any]:
+    def _real_time_factor(self) -> Optional[float]:
+        if not self.audio_seconds:
+            return None
+        rtf = self.timer.timings.get('whisper', 0.0) / self.audio_seconds
+        if self.tier:
+            record_rtf(self.tier.name, rtf)
+        return rtf
+
+    def _emit(self, event: str, data: Dict[str, Any]):
+        if self._on_event is None:
+            return
+        try:
+            self._on_event(event, data)
+        except Exception as e:
+            print(f"Event listener error: {e}", file=sys.stderr)
+
+    async def _timed(self, stage: str, coro):
+        if self.stage_limits is not None:
+            # Batch mode: wait for a free slot in this stage first
+            async with self.stage_limits.slot(stage):
+                return await self._run_stage(stage, coro)
+        return await self._run_stage(stage, coro)
+
+    async def _run_stage(self, stage: str, coro):
+        self._emit('stage', {'stage': stage, 'status': 'started'})
+        with self.timer.stage(stage):
+            result = await coro
+        self._emit('stage', {'stage': stage, 'status': 'completed'})
+        return result
+
+    async def _metadata_stage(self, youtube_url: str) -> Dict[str, Any]:
+        metadata = await self._timed('metadata', self.get_metadata_only(youtube_url))
+        self._emit('metadata', {'metadata': metadata})
+        return metadata
+
+    async def analyze_video_enhanced(self, youtube_url: str, on_event=None) -> Dict[str, Any]:
+        # on_event(event, data) is called as each stage produces output, with
+        # the same events as the fast analyzer
         start_time = time.time()
+        self.timer = StageTimer()
+        self._on_event = on_event
         
         try:
             print("🚀 Starting enhanced metadata analysis...", file=sys.stderr)
@@ -60,8 +150,8 @@ class EnhancedMetadataAnalyzer:
             
             print(f"📹 Video ID: {video_id}", file=sys.stderr)
             
-            metadata_task = self.get_metadata_only(youtube_url)
-            transcript_task = self.get_youtube_transcript(video_id)
+            metadata_task = self._metadata_stage(youtube_url)
+            transcript_task = self._timed('transcript_fetch', self.get_youtube_transcript(video_id))
             
             metadata, transcript = await asyncio.gather(metadata_task, transcript_task)
             
@@ -70,31 +160,49 @@ class EnhancedMetadataAnalyzer:
             
             if not transcript:
                 print("🔄 Falling back to Faster-Whisper transcription...", file=sys.stderr)
-                video_path = await self.download_video_optimized(youtube_url)
-                if video_path:
-                    transcript = await self.transcribe_with_faster_whisper(video_path)
+                audio = await self._timed('download', self.stream_audio(youtube_url))
+                if audio is not None:
+                    self.audio_seconds = len(audio) / 16000
+                    transcript = await self._timed('whisper', self.transcribe_with_faster_whisper(audio))
                     print(f"✅ Faster-Whisper transcript: {len(transcript)} segments", file=sys.stderr)
             
+            if self._on_event is not None:
+                # Slicing the columns builds segment dicts one event batch at a time
+                emit_transcript(self._emit, transcript)
+            self._emit('keyframes', {'frames': []})
+            
             print("🧠 Creating intelligent chapters based on content...", file=sys.stderr)
-            chapters = await self.create_smart_chapters(transcript, metadata)
+            chapters = await self._timed('chapters', self.create_smart_chapters(transcript, metadata))
             print(f"✅ Intelligent chapters: {len(chapters)}", file=sys.stderr)
+            self._emit('chapters', {'chapters': chapters})
+            # Segment dicts only at the output boundary, after chaptering
+            segments = transcript.to_segments()
             
             result = {
                 'success': True,
                 'video_id': video_id,
                 'metadata': metadata,
-                'transcript': transcript,
+                'transcript': segments,
                 'chapters': chapters,
                 'keyFrames': [],
                 'processing_time': time.time() - start_time,
                 'analysis_method': 'enhanced_metadata_youtube',
+                'timings': self.timer.timings,
                 'stats': {
                     'transcript_segments': len(transcript),
                     'chapters_generated': len(chapters),
                     'key_frames_extracted': 0,
                     'transcript_source': 'youtube_api' if transcript and not self.whisper_model else 'faster_whisper',
                     'chapter_method': 'smart_content_analysis',
-                    'video_downloaded': bool(self.whisper_model)
+                    'video_downloaded': False,
+                    'audio_streamed': bool(self.whisper_model),
+                    'bytes_downloaded': self.bytes_downloaded,
+                    'audio_seconds': self.audio_seconds,
+                    'real_time_factor': self._real_time_factor(),
+                    'vad_skipped_fraction': self.vad_skipped_fraction,
+                    'whisper_tier': self.tier.name if self.tier else None,
+                    'whisper_model': self.tier.model if self.tier else None,
+                    'compute_type': self.compute_type or (self.tier.compute_type if self.tier else None),
                 }
             }
             
@@ -107,7 +215,8 @@ class EnhancedMetadataAnalyzer:
                 'error': str(e),
                 'video_id': video_id if 'video_id' in locals() else '',
                 'processing_time': time.time() - start_time,
-                'analysis_method': 'enhanced_metadata_youtube'
+                'analysis_method': 'enhanced_metadata_youtube',
+                'timings': self.timer.timings,
             }
             print(f"❌ Analysis failed: {e}", file=sys.stderr)
             return error_result
@@ -129,24 +238,23 @@ class EnhancedMetadataAnalyzer:
         def _extract_metadata():
             try:
                 print("🔍 Extracting video metadata...", file=sys.stderr)
-                with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    description = self.clean_text_for_json(info.get('description', '') or '')
-                    return {
-                        'id': info.get('id', ''),
-                        'title': self.clean_text_for_json(info.get('title', 'Unknown Title')),
-                        'author': self.clean_text_for_json(info.get('uploader', 'Unknown Author')),
-                        'channel': self.clean_text_for_json(info.get('channel', '')),
-                        'duration': info.get('duration', 0),
-                        'view_count': info.get('view_count', 0),
-                        'like_count': info.get('like_count', 0),
-                        'upload_date': info.get('upload_date', ''),
-                        'description': description,
-                        'thumbnail': info.get('thumbnail', ''),
-                        'tags': [self.clean_text_for_json(tag) for tag in (info.get('tags', []) or [])[:15]],
-                        'category': info.get('category', ''),
-                        'webpage_url': info.get('webpage_url', ''),
-                    }
+                info = self.info = extract_info(url)
+                description = self.clean_text_for_json(info.get('description', '') or '')
+                return {
+                    'id': info.get('id', ''),
+                    'title': self.clean_text_for_json(info.get('title', 'Unknown Title')),
+                    'author': self.clean_text_for_json(info.get('uploader', 'Unknown Author')),
+                    'channel': self.clean_text_for_json(info.get('channel', '')),
+                    'duration': info.get('duration', 0),
+                    'view_count': info.get('view_count', 0),
+                    'like_count': info.get('like_count', 0),
+                    'upload_date': info.get('upload_date', ''),
+                    'description': description,
+                    'thumbnail': info.get('thumbnail', ''),
+                    'tags': [self.clean_text_for_json(tag) for tag in (info.get('tags', []) or [])[:15]],
+                    'category': info.get('category', ''),
+                    'webpage_url': info.get('webpage_url', ''),
+                }
             except Exception as e:
                 print(f"Metadata extraction error: {e}", file=sys.stderr)
                 return {
@@ -167,7 +275,7 @@ class EnhancedMetadataAnalyzer:
         
         return await loop.run_in_executor(None, _extract_metadata)
 
-    async def get_youtube_transcript(self, video_id: str) -> List[Dict[str, Any]]:
+    async def get_youtube_transcript(self, video_id: str) -> ColumnarTranscript:
         loop = asyncio.get_event_loop()
         
         def _get_transcript():
@@ -190,81 +298,79 @@ class EnhancedMetadataAnalyzer:
                     if available:
                         transcript = available[0]
                 
+                columns = ColumnarTranscript('youtube_api', language='en', is_generated=False, confidence=1.0)
                 if transcript:
-                    segments = transcript.fetch()
-                    return [
-                        {
-                            'text': self.clean_text_for_json(segment['text'].strip()),
-                            'start': segment['start'],
-                            'end': segment['start'] + segment['duration'],
-                            'confidence': 1.0,
-                            'duration': segment['duration'],
-                            'source': 'youtube_api',
-                            'language': 'en',
-                            'is_generated': False
-                        }
-                        for segment in segments
-                        if segment['text'].strip()
-                    ]
-                return []
+                    for segment in transcript.fetch():
+                        text = segment['text'].strip()
+                        if text:
+                            columns.append(segment['start'], segment['start'] + segment['duration'],
+                                           self.clean_text_for_json(text))
+                return columns
             except Exception as e:
                 print(f"YouTube transcript error: {e}", file=sys.stderr)
-                return []
+                return ColumnarTranscript('youtube_api')
         
         return await loop.run_in_executor(None, _get_transcript)
 
-    async def download_video_optimized(self, url: str) -> Optional[str]:
+    async def stream_audio(self, url: str) -> Optional[Any]:
         loop = asyncio.get_event_loop()
         
-        def _download():
+        def _stream():
             try:
-                video_path = os.path.join(tempfile.mkdtemp(), 'video.%(ext)s')
-                ydl_opts = {
-                    **self.ydl_opts,
-                    'format': 'worst[height<=480]/worst[height<=720]/worst',
-                    'outtmpl': video_path,
-                    'merge_output_format': 'mp4',
-                }
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
-                for file in os.listdir(os.path.dirname(video_path)):
-                    if file.startswith('video.') and file.endswith(('.mp4', '.webm', '.mkv')):
-                        return os.path.join(os.path.dirname(video_path), file)
-                return None
+                print("🎧 Streaming audio-only track...", file=sys.stderr)
+                audio_ingest, _, _, _ = _whisper_fallback()
+                audio, stream = audio_ingest.load_audio_stream(url, info=self.info, scratch=get_scratch_space())
+                self.bytes_downloaded = stream['bytes']
+                source = "media cache" if stream['cached'] else "format"
+                print(f"✅ Audio streamed: {stream['audio_seconds']:.0f}s from {source} {stream['format_id']}", file=sys.stderr)
+                return audio if len(audio) else None
             except Exception as e:
-                print(f"Download error: {e}", file=sys.stderr)
+                print(f"Audio stream error: {e}", file=sys.stderr)
                 return None
         
-        return await loop.run_in_executor(None, _download)
+        return await loop.run_in_executor(None, _stream)
 
-    async def transcribe_with_faster_whisper(self, video_path: str) -> List[Dict[str, Any]]:
+    async def transcribe_with_faster_whisper(self, audio: Any) -> ColumnarTranscript:
         loop = asyncio.get_event_loop()
         
         def _transcribe():
             try:
-                if not self.whisper_model:
-                    print("Loading Faster-Whisper model...", file=sys.stderr)
-                    self.whisper_model = WhisperModel("base", device="cpu")
-                
-                print("Transcribing with Faster-Whisper...", file=sys.stderr)
-                segments, _ = self.whisper_model.transcribe(video_path, language='en')
-                return [
-                    {
-                        'text': self.clean_text_for_json(segment.text.strip()),
-                        'start': segment.start,
-                        'end': segment.end,
-                        'confidence': 0.8,
-                        'duration': segment.end - segment.start,
-                        'source': 'faster_whisper',
-                        'language': 'en',
-                        'is_generated': True
-                    }
-                    for segment in segments
-                    if segment.text.strip()
-                ]
+                _, parallel_transcribe, vad, whisper_models = _whisper_fallback()
+                workers = parallel_transcribe.DEFAULT_TRANSCRIBE_WORKERS
+                self.tier = choose_tier(self.audio_seconds)
+                print(f"🎚️ Whisper tier: {self.tier.name} ({self.tier.model}, {self.tier.compute_type})", file=sys.stderr)
+                speech = vad.detect_speech(audio)
+                self.vad_skipped_fraction = speech.skipped_seconds / speech.total_seconds if speech.total_seconds else 0.0
+                print(f"🔇 Skipping {self.vad_skipped_fraction:.0%} of the audio as silence", file=sys.stderr)
+                if not len(speech.pcm):
+                    segments = []
+                elif workers > 1:
+                    print(f"Transcribing with Faster-Whisper on {workers} workers...", file=sys.stderr)
+                    self.whisper_model = parallel_transcribe.get_parallel_transcriber(
+                        "faster_whisper", self.tier.model, compute_type=self.tier.compute_type
+                    )
+                    segments = speech.remap(self.whisper_model.transcribe(speech.pcm, language='en'))
+                    self.compute_type = self.whisper_model.compute_type_in_use()
+                else:
+                    if not self.whisper_model:
+                        print("Loading Faster-Whisper model...", file=sys.stderr)
+                        self.whisper_model = whisper_models.get_faster_whisper_model(self.tier.model, compute_type=self.tier.compute_type)
+                    
+                    print("Transcribing with Faster-Whisper...", file=sys.stderr)
+                    segments, _ = self.whisper_model.transcribe(speech.pcm, language='en')
+                    segments = speech.remap([{'text': s.text, 'start': s.start, 'end': s.end} for s in segments])
+                    self.compute_type = whisper_models.compute_type_in_use(
+                        self.tier.model, self.tier.compute_type, backend="faster_whisper"
+                    )
+                columns = ColumnarTranscript('faster_whisper', language='en', is_generated=True, confidence=0.8)
+                for segment in segments:
+                    text = segment['text'].strip()
+                    if text:
+                        columns.append(segment['start'], segment['end'], self.clean_text_for_json(text))
+                return columns
             except Exception as e:
                 print(f"Faster-Whisper transcription error: {e}", file=sys.stderr)
-                return []
+                return ColumnarTranscript('faster_whisper')
         
         return await loop.run_in_executor(None, _transcribe)
 
@@ -275,10 +381,21 @@ class EnhancedMetadataAnalyzer:
             return description_chapters
         
         if transcript and len(transcript) > 10:
-            content_chapters = await self.create_content_based_chapters(transcript, metadata)
+            try:
+                content_chapters = await asyncio.wait_for(
+                    self.create_content_based_chapters(transcript, metadata), LLM_TIMEOUT_SECONDS or None
+                )
+            except asyncio.TimeoutError:
+                print(f"⌛ Content-based chapters timed out after {LLM_TIMEOUT_SECONDS:.0f}s", file=sys.stderr)
+                content_chapters = []
             if content_chapters:
                 print(f"🤖 Created {len(content_chapters)} content-based chapters", file=sys.stderr)
                 return content_chapters
+            
+            cohesion_chapters = self.create_cohesion_chapters(transcript, metadata)
+            if cohesion_chapters:
+                print(f"🧩 Created {len(cohesion_chapters)} lexical-cohesion chapters", file=sys.stderr)
+                return cohesion_chapters
         
         time_chapters = self.create_time_chapters(metadata.get('duration', 0))
         print(f"⏰ Created {len(time_chapters)} time-based chapters", file=sys.stderr)
@@ -318,82 +435,35 @@ class EnhancedMetadataAnalyzer:
                     return chapters
         return []
 
+    async def _complete(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        return await self.llm.chat(messages, max_tokens, temperature=0.3)
+
     async def create_content_based_chapters(self, transcript: List[Dict], metadata: Dict) -> List[Dict[str, Any]]:
         try:
-            chunk_size = max(20, len(transcript) // 8)
-            chunks = []
-            for i in range(0, len(transcript), chunk_size):
-                chunk = transcript[i:i + chunk_size]
-                chunk_text = ' '.join([seg['text'] for seg in chunk])
-                chunk_start = chunk[0]['start']
-                chunk_end = chunk[-1]['end']
-                chunks.append({
-                    'text': chunk_text,
-                    'start': chunk_start,
-                    'end': chunk_end,
-                    'segment_count': len(chunk)
-                })
-            
-            duration_minutes = metadata.get('duration', 0) / 60
-            prompt = f"""Analyze this {duration_minutes:.1f}-minute video transcript and create logical chapters based on natural topic changes and content flow.
-
-Video: "{metadata.get('title', 'Unknown')}" by {metadata.get('author', 'Unknown')}
-
-Transcript chunks with timestamps:
-"""
-            for i, chunk in enumerate(chunks[:6]):
-                start_min = int(chunk['start'] // 60)
-                start_sec = int(chunk['start'] % 60)
-                prompt += f"\n[{start_min}:{start_sec:02d}] {chunk['text'][:300]}..."
-            
-            prompt += """
-
-Create chapters in this exact JSON format:
-{
-  "chapters": [
-    {
-      "title": "Engaging Chapter Title",
-      "start_seconds": 0,
-      "end_seconds": 180,
-      "summary": "Brief description of this section's content",
-      "main_topic": "Key theme or subject"
-    }
-  ]
-}
-"""
-
-            response = self.groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {"role": "system", "content": "You are an expert at analyzing video content and creating logical chapter divisions. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.3
+            sections = await map_reduce_chapters(
+                transcript,
+                self._complete,
+                title=metadata.get('title', ''),
+                duration=metadata.get('duration') or None,
             )
-            content = response.choices[0].message.content.strip()
-            if content.startswith('```'):
-                content = content.split('```')[1].lstrip('json')
-            
-            result = json.loads(content)
-            chapters_data = result.get('chapters', [])
             
+            index = self.transcript_index(transcript)
             formatted_chapters = []
-            for i, chapter in enumerate(chapters_data):
-                start_time = float(chapter.get('start_seconds', i * 60))
-                end_time = float(chapter.get('end_seconds', (i + 1) * 60))
-                chapter_text = self.get_transcript_text_for_timerange(transcript, start_time, end_time)
+            for i, chapter in enumerate(sections):
+                start_time = chapter['start']
+                end_time = chapter['end']
+                chapter_text = index.text_between(start_time, end_time)
                 word_count = len(chapter_text.split()) if chapter_text else 0
                 
                 formatted_chapters.append({
                     'id': f'content_chapter_{i}',
-                    'title': self.clean_text_for_json(chapter.get('title', f'Chapter {i+1}'))[:80],
+                    'title': self.clean_text_for_json(chapter['title'] or f'Chapter {i+1}')[:80],
                     'start_time': start_time,
                     'end_time': end_time,
-                    'summary': self.clean_text_for_json(chapter.get('summary', ''))[:200],
-                    'key_topics': self.extract_keywords(chapter.get('main_topic', '') + ' ' + chapter.get('title', '')),
+                    'summary': self.clean_text_for_json(chapter['summary'])[:200],
+                    'key_topics': self.extract_keywords(chapter['main_topic'] + ' ' + chapter['title']),
                     'word_count': word_count,
-                    'main_topic': self.clean_text_for_json(chapter.get('main_topic', ''))[:100],
+                    'main_topic': self.clean_text_for_json(chapter['main_topic'])[:100],
                     'source': 'content_analysis'
                 })
             return formatted_chapters
@@ -401,9 +471,39 @@ Create chapters in this exact JSON format:
             print(f"Content-based chapter creation error: {e}", file=sys.stderr)
             return []
 
+    def create_cohesion_chapters(self, transcript: List[Dict], metadata: Dict) -> List[Dict[str, Any]]:
+        # TextTiling over the transcript: local, deterministic, no LLM call
+        try:
+            sections = cohesion_sections(transcript, metadata.get('duration') or None)
+        except Exception as e:
+            print(f"Lexical-cohesion chapter error: {e}", file=sys.stderr)
+            return []
+        index = self.transcript_index(transcript)
+        chapters = []
+        for i, section in enumerate(sections):
+            chapter_text = index.text_between(section['start'], section['end'])
+            chapters.append({
+                'id': f'cohesion_chapter_{i}',
+                'title': self.clean_text_for_json(section['title'])[:80],
+                'start_time': section['start'],
+                'end_time': section['end'],
+                'summary': self.clean_text_for_json(section['summary'])[:200],
+                'key_topics': section['key_topics'],
+                'word_count': len(chapter_text.split()) if chapter_text else 0,
+                'main_topic': self.clean_text_for_json(section['main_topic'])[:100],
+                'source': 'lexical_cohesion'
+            })
+        return chapters
+
+    def transcript_index(self, transcript: List[Dict]) -> TranscriptIndex:
+        # Built once per transcript and shared by every range lookup on it
+        if self._index_source is not transcript:
+            self._index = TranscriptIndex(transcript)
+            self._index_source = transcript
+        return self._index
+
     def get_transcript_text_for_timerange(self, transcript: List[Dict], start_time: float, end_time: float) -> str:
-        text_parts = [seg['text'] for seg in transcript if seg['start'] >= start_time and seg['end'] <= end_time]
-        return ' '.join(text_parts)
+        return self.transcript_index(transcript).text_between(start_time, end_time)
 
     def timestamp_to_seconds(self, timestamp: str) -> float:
         try:
@@ -459,15 +559,90 @@ Create chapters in this exact JSON format:
         secs = int(seconds % 60)
         return f"{minutes}:{secs:02d}"
 
+async def analyze_url(youtube_url: str, stage_limits: Optional[StageLimits] = None,
+                      on_event=None) -> Dict[str, Any]:
+    analyzer = EnhancedMetadataAnalyzer(stage_limits)
+    video_id = analyzer.extract_video_id(youtube_url)
+    if not video_id:
+        return {'success': False, 'error': 'Invalid YouTube URL'}
+    cache = get_result_cache()
+    version = analyzer.cache_version()
+    result = cache.get(video_id, version) if cache else None
+    if result is not None and not cached_tier_current(result):
+        print(f"🔄 Cached analysis for {video_id} used a less accurate tier than now applies", file=sys.stderr)
+        result = None
+    if result is not None:
+        print(f"⚡ Serving cached analysis for {video_id}", file=sys.stderr)
+        result['cached'] = True
+        if on_event:
+            replay_events(result, on_event, ANALYSIS_STAGES)
+        return result
+    result = await analyzer.analyze_video_enhanced(youtube_url, on_event)
+    if cache and is_cacheable(result):
+        cache.put(video_id, version, result)
+    index = get_search_index()
+    if index:
+        # The result is already good; a busy shared index must not fail it
+        try:
+            await asyncio.to_thread(index.add_result, video_id, result)
+        except Exception:
+            logger.warning(f"Search indexing failed for {video_id}", exc_info=True)
+    return result
+
+async def analyze_batch(args: List[str]):
+    # One NDJSON line per video, in completion order; nothing else may reach stdout
+    out = claim_stdout()
+    urls = await asyncio.to_thread(expand_playlists, read_urls(args))
+    print(f"📦 Batch of {len(urls)} videos", file=sys.stderr)
+    stage_limits = StageLimits()
+
+    async def analyze_one(url: str) -> Dict[str, Any]:
+        return await analyze_url(url, stage_limits)
+
+    async for index, url, result in run_batch(urls, analyze_one):
+        record = {'index': index, 'url': url, 'video_id': result.get('video_id'), 'result': result}
+        out.write(json.dumps(record, ensure_ascii=True, separators=(',', ':')) + '\n')
+        out.flush()
+
+async def serve():
+    # Resident mode for callers that would otherwise spawn one process per
+    # video; Faster-Whisper is only a fallback, so it loads on first use.
+    stage_limits = StageLimits()
+
+    async def handle(request: Dict[str, Any]) -> Dict[str, Any]:
+        return await analyze_url(request.get('url') or '', stage_limits)
+
+    await StdioServer(handle, 'metadata_analysis').serve()
+
+async def analyze_stream(youtube_url: str) -> bool:
+    # One NDJSON event per line as each stage produces output, then a final
+    # "result" line with the stats
+    writer = NdjsonEventWriter(claim_stdout(), ensure_ascii=True)
+    try:
+        result = await analyze_url(youtube_url, on_event=writer)
+    except Exception as e:
+        result = {'success': False, 'error': f'Analysis error: {str(e)}'}
+    writer.finish(result)
+    return bool(result.get('success'))
+
 async def main():
-    if len(sys.argv) != 2:
+    if sys.argv[1:2] == ['--batch']:
+        await analyze_batch(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['--serve']:
+        await serve()
+        return
+    stream = sys.argv[1:2] == ['--stream']
+    args = sys.argv[2:] if stream else sys.argv[1:]
+
+    if len(args) != 1:
         print(json.dumps({
             'success': False,
-            'error': 'Usage: python metadata_analysis.py <youtube_url>'
+            'error': 'Usage: python metadata_analysis.py [--stream] <youtube_url> | --batch <url|playlist|file|->... | --serve'
         }, ensure_ascii=True))
         sys.exit(1)
     
-    youtube_url = sys.argv[1]
+    youtube_url = args[0]
     if 'youtube.com' not in youtube_url and 'youtu.be' not in youtube_url:
         print(json.dumps({
             'success': False,
@@ -475,9 +650,10 @@ async def main():
         }, ensure_ascii=True))
         sys.exit(1)
     
+    if stream:
+        sys.exit(0 if await analyze_stream(youtube_url) else 1)
     try:
-        analyzer = EnhancedMetadataAnalyzer()
-        result = await analyzer.analyze_video_enhanced(youtube_url)
+        result = await analyze_url(youtube_url)
         json_str = json.dumps(result, ensure_ascii=True, separators=(',', ':'))
         print(json_str)
         sys.exit(0 if result.get('success') else 1)
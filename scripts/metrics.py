@@ -0,0 +1,160 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans sub-second LLM/cache work up to long Whisper runs
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    labels = _format_labels(self.labels, key, {"le": _format_value(bound)})
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per pipeline stage into ``timings``."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.timings[name] = round(self.timings.get(name, 0.0) + seconds, 4)
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "clipify_stage_seconds", "Wall-clock seconds spent in each analysis stage", labels=("stage",)))
+ANALYSIS_SECONDS = REGISTRY.register(Histogram(
+    "clipify_analysis_seconds", "End-to-end analysis time in seconds", labels=("outcome",)))
+ANALYSES = REGISTRY.register(Counter(
+    "clipify_analyses_total", "Analyses served, by outcome", labels=("outcome",)))
+BYTES_DOWNLOADED = REGISTRY.register(Counter(
+    "clipify_bytes_downloaded_total", "Media bytes downloaded for analysis"))
+AUDIO_SECONDS = REGISTRY.register(Counter(
+    "clipify_audio_seconds_total", "Seconds of audio processed by Whisper"))
+REAL_TIME_FACTOR = REGISTRY.register(Histogram(
+    "clipify_real_time_factor", "Transcription time divided by audio duration, by Whisper tier",
+    labels=("tier",), buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 4)))
+
+
+def record_analysis(result, cached=False):
+    """Feed a finished analysis result into the process-wide metrics."""
+    if cached:
+        ANALYSES.inc(outcome="cached")
+        return
+    outcome = "success" if result.get("success") else "failure"
+    ANALYSES.inc(outcome=outcome)
+    for stage, seconds in (result.get("timings") or {}).items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    total = result.get("duration_seconds", result.get("processing_time"))
+    if total:
+        ANALYSIS_SECONDS.observe(total, outcome=outcome)
+    stats = result.get("stats") or {}
+    if stats.get("bytes_downloaded"):
+        BYTES_DOWNLOADED.inc(stats["bytes_downloaded"])
+    if stats.get("audio_seconds") and stats.get("real_time_factor") is not None:
+        AUDIO_SECONDS.inc(stats["audio_seconds"])
+        REAL_TIME_FACTOR.observe(stats["real_time_factor"], tier=stats.get("whisper_tier", ""))
@@ -0,0 +1,233 @@
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .audio_ingest import SAMPLE_RATE
+    from .forkserver import get_mp_context
+    from .vad import FRAME_MS, frame_rms
+    from .whisper_models import compute_type_in_use, get_faster_whisper_model, get_whisper_model
+except ImportError:
+    from audio_ingest import SAMPLE_RATE
+    from forkserver import get_mp_context
+    from vad import FRAME_MS, frame_rms
+    from whisper_models import compute_type_in_use, get_faster_whisper_model, get_whisper_model
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "1"))
+DEFAULT_CHUNK_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "60"))
+
+# Pauses are found on energy smoothed over ~300 ms so a single quiet frame
+# in the middle of a word is not mistaken for a sentence break.
+SMOOTH_FRAMES = 10
+BOUNDARY_OVERLAP_WORDS = 6
+
+
+def split_at_silence(pcm, sample_rate=SAMPLE_RATE, target_seconds=DEFAULT_CHUNK_SECONDS, search_seconds=None):
+    """Split PCM into ~target_seconds chunks, cutting at the quietest point
+    within ``search_seconds`` of each nominal boundary.
+
+    Returns a list of ``(start_sample, end_sample)`` pairs covering ``pcm``.
+    """
+    frame_len = int(sample_rate * FRAME_MS / 1000)
+    target = int(target_seconds * 1000 / FRAME_MS)
+    search = int((search_seconds if search_seconds is not None else target_seconds / 6) * 1000 / FRAME_MS)
+    energy = frame_rms(pcm, frame_len)
+    if len(energy) < target * 1.5:
+        return [(0, len(pcm))]
+    smooth = np.convolve(energy, np.ones(SMOOTH_FRAMES) / SMOOTH_FRAMES, mode='same')
+
+    bounds = [0]
+    pos = 0
+    while len(energy) - pos > target * 1.5:
+        lo = pos + target - search
+        hi = min(pos + target + search, len(energy))
+        pos = lo + int(np.argmin(smooth[lo:hi]))
+        bounds.append(pos * frame_len)
+    bounds.append(len(pcm))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class PcmChunker:
+    """Cuts PCM that arrives piece by piece into silence-bounded chunks.
+
+    ``feed`` returns the ``(pcm, offset_seconds)`` chunks that are final;
+    the tail is held back until enough audio follows it to pick a quiet cut
+    point. ``finish`` returns whatever is left.
+    """
+
+    def __init__(self, chunk_seconds=DEFAULT_CHUNK_SECONDS, sample_rate=SAMPLE_RATE):
+        self.chunk_seconds = chunk_seconds
+        self.sample_rate = sample_rate
+        self._buffer = np.zeros(0, np.float32)
+        self._offset = 0
+
+    def feed(self, pcm):
+        self._buffer = np.concatenate([self._buffer, pcm])
+        spans = split_at_silence(self._buffer, self.sample_rate, self.chunk_seconds)
+        if len(spans) < 2:
+            return []
+        ready = [(self._buffer[start:end], (self._offset + start) / self.sample_rate) for start, end in spans[:-1]]
+        cut = spans[-1][0]
+        self._buffer = self._buffer[cut:].copy()
+        self._offset += cut
+        return ready
+
+    def finish(self):
+        if not len(self._buffer):
+            return []
+        ready = [(self._buffer, self._offset / self.sample_rate)]
+        self._buffer = np.zeros(0, np.float32)
+        return ready
+
+
+def _words(text):
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def stitch_segments(chunks):
+    """Concatenate per-chunk segments (already on the global timeline) and
+    drop text Whisper repeated on both sides of a chunk boundary."""
+    merged = []
+    for segments in chunks:
+        append_chunk(merged, segments)
+    return merged
+
+
+def append_chunk(merged, segments):
+    """Stitch the next chunk's segments onto ``merged`` in place and return
+    the segments that were added."""
+    added = []
+    for position, segment in enumerate(segments):
+        if merged and position == 0:
+            segment = _trim_repeated_prefix(merged[-1], segment)
+            if segment is None:
+                continue
+        segment['id'] = len(merged)
+        merged.append(segment)
+        added.append(segment)
+    return added
+
+
+def _trim_repeated_prefix(previous, segment):
+    prev_words = _words(previous['text'])
+    words = segment['text'].split()
+    normalized = _words(segment['text'])
+    if not normalized or normalized == prev_words[-len(normalized):]:
+        return None
+    for k in range(min(BOUNDARY_OVERLAP_WORDS, len(prev_words), len(normalized)), 0, -1):
+        if prev_words[-k:] == normalized[:k]:
+            # Drop as many raw tokens as there were repeated words; punctuation
+            # is attached to tokens so the counts line up for normal text.
+            segment = dict(segment)
+            segment['text'] = ' ' + ' '.join(words[k:])
+            return segment if words[k:] else None
+    return segment
+
+
+_worker_backend = None
+_worker_model = None
+_worker_model_name = None
+_worker_compute_type_setting = None
+
+
+def _init_worker(backend, model_name, threads, compute_type):
+    global _worker_backend, _worker_model, _worker_model_name, _worker_compute_type_setting
+    _worker_backend = backend
+    _worker_model_name = model_name
+    _worker_compute_type_setting = compute_type
+    if backend == "faster_whisper":
+        _worker_model = get_faster_whisper_model(model_name, compute_type=compute_type, cpu_threads=threads)
+    else:
+        import torch
+        torch.set_num_threads(threads)
+        _worker_model = get_whisper_model(model_name, compute_type)
+
+
+def _worker_compute_type():
+    return compute_type_in_use(_worker_model_name, _worker_compute_type_setting, _worker_backend)
+
+
+def _transcribe_chunk(pcm, offset, language):
+    return transcribe_chunk_with(_worker_backend, _worker_model, pcm, offset, language)
+
+
+def transcribe_chunk_with(backend, model, pcm, offset, language=None):
+    """Transcribe one chunk and shift its segments onto the global timeline."""
+    if backend == "faster_whisper":
+        segments, _ = model.transcribe(pcm, language=language)
+        result = [{'start': s.start, 'end': s.end, 'text': s.text} for s in segments]
+    else:
+        result = model.transcribe(pcm, fp16=False, language=language)['segments']
+    for segment in result:
+        segment['start'] += offset
+        segment['end'] += offset
+        if 'seek' in segment:
+            segment['seek'] += int(offset * 100)
+    return result
+
+
+class ParallelTranscriber:
+    """Transcribes long audio by splitting it at silences and fanning the
+    chunks out to worker processes that each hold their own model."""
+
+    def __init__(self, workers=None, backend="whisper", model_name=None, chunk_seconds=DEFAULT_CHUNK_SECONDS,
+                 compute_type=None):
+        self.workers = workers or DEFAULT_TRANSCRIBE_WORKERS
+        self.backend = backend
+        self.model_name = model_name
+        self.compute_type = compute_type or ("default" if backend == "faster_whisper" else "float32")
+        self.chunk_seconds = chunk_seconds
+        self._effective_compute_type = None
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_mp_context(),
+            initializer=_init_worker,
+            initargs=(backend, model_name, threads, self.compute_type),
+        )
+
+    def transcribe(self, pcm, language=None):
+        spans = split_at_silence(pcm, target_seconds=self.chunk_seconds)
+        logger.info(f"Transcribing {len(pcm) / SAMPLE_RATE:.0f}s of audio as {len(spans)} chunks on {self.workers} workers")
+        futures = [
+            self._executor.submit(_transcribe_chunk, pcm[start:end], start / SAMPLE_RATE, language)
+            for start, end in spans
+        ]
+        return stitch_segments([future.result() for future in futures])
+
+    def submit(self, pcm, offset, language=None):
+        """Queue one chunk already cut by the caller; returns a concurrent future."""
+        return self._executor.submit(_transcribe_chunk, pcm, offset, language)
+
+    def compute_type_in_use(self):
+        """Compute type the workers' model really runs with (every
+        worker loads the same one); falls back to the requested type."""
+        if self._effective_compute_type is None:
+            self._effective_compute_type = (
+                self._executor.submit(_worker_compute_type).result() or self.compute_type
+            )
+        return self._effective_compute_type
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_transcribers = {}
+_transcribers_lock = threading.Lock()
+
+
+def get_parallel_transcriber(backend="whisper", model_name=None, workers=None, compute_type=None):
+    workers = workers or DEFAULT_TRANSCRIBE_WORKERS
+    key = (backend, model_name, workers, compute_type)
+    with _transcribers_lock:
+        transcriber = _transcribers.get(key)
+        if transcriber is None:
+            transcriber = ParallelTranscriber(workers, backend, model_name, compute_type=compute_type)
+            _transcribers[key] = transcriber
+    return transcriber
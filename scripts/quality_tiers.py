@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+Tier = namedtuple("Tier", ["name", "model", "compute_type"])
+
+# Ordered from most accurate to fastest
+TIERS = {
+    "accurate": Tier("accurate", "small", "float32"),
+    "balanced": Tier("balanced", "base", "int8"),
+    "fast": Tier("fast", "tiny", "int8"),
+}
+# Planning estimates of CPU transcription seconds per audio second; replaced
+# by measured values as transcriptions finish.
+EXPECTED_RTF = {"accurate": 0.5, "balanced": 0.15, "fast": 0.06}
+RTF_SMOOTHING = 0.3
+
+# "auto" lets choose_tier decide per video; a tier name forces that tier.
+DEFAULT_TIER = os.getenv("WHISPER_TIER", "auto")
+# Setting WHISPER_MODEL pins one float32 model and bypasses the tiers
+PINNED_MODEL = os.getenv("WHISPER_MODEL")
+LATENCY_TARGET_SECONDS = float(os.getenv("WHISPER_LATENCY_TARGET_SECONDS", "300"))
+
+_observed_rtf = {}
+_lock = threading.Lock()
+
+
+def pinned_tier(model_name):
+    return Tier("pinned", model_name, "float32")
+
+
+def expected_rtf(tier_name):
+    with _lock:
+        return _observed_rtf.get(tier_name, EXPECTED_RTF.get(tier_name, 1.0))
+
+
+def record_rtf(tier_name, rtf):
+    """Fold an achieved real-time factor into the estimate for its tier."""
+    if not rtf or tier_name not in TIERS:
+        return
+    with _lock:
+        previous = _observed_rtf.get(tier_name, EXPECTED_RTF[tier_name])
+        _observed_rtf[tier_name] = (1 - RTF_SMOOTHING) * previous + RTF_SMOOTHING * rtf
+
+
+def choose_tier(duration, queue_depth=0, latency_target=LATENCY_TARGET_SECONDS, requested=None, model_name=None):
+    """Pick the most accurate tier expected to finish within ``latency_target``.
+
+    Each job queued ahead is assumed to take about as long as this one, so
+    the predicted latency is ``duration * rtf * (1 + queue_depth)``. An
+    explicit ``model_name`` or a forced tier skips the policy.
+    """
+    model_name = model_name or PINNED_MODEL
+    if model_name:
+        return pinned_tier(model_name)
+    requested = requested or DEFAULT_TIER
+    if requested in TIERS:
+        return TIERS[requested]
+    if not duration:
+        return TIERS["balanced"]
+    tier = _tier_within(duration, queue_depth, latency_target)
+    logger.info(f"Whisper tier {tier.name} ({tier.model}/{tier.compute_type}) for {duration:.0f}s "
+                f"with {queue_depth} queued, target {latency_target:.0f}s")
+    return tier
+
+
+def _tier_within(duration, queue_depth, latency_target):
+    for tier in TIERS.values():
+        predicted = duration * expected_rtf(tier.name) * (1 + queue_depth)
+        if predicted <= latency_target:
+            break
+    return tier
+
+
+def tier_degraded(tier, duration, queue_depth, latency_target=LATENCY_TARGET_SECONDS, model_name=None):
+    """Whether ``choose_tier`` picked ``tier`` over a more accurate one only
+    because of the jobs queued ahead. Cache keys carry the tier setting, not
+    the tier, so such results must not be cached: an idle pipeline would
+    produce a better one under the same key."""
+    if model_name or PINNED_MODEL or DEFAULT_TIER in TIERS or not duration or not queue_depth:
+        return False
+    return tier != _tier_within(duration, 0, latency_target)
+
+
+def cached_tier_current(result, model_name=None):
+    """Whether a cached ``result`` may still be served.
+
+    Cache keys carry the tier setting, but under "auto" the tier a duration
+    resolves to moves as ``record_rtf`` updates the estimates. A result is
+    current while the tier it was transcribed with (kept in its stats) is
+    at least as accurate as the one an idle pipeline would pick for it now.
+    """
+    name = result.get("stats", {}).get("whisper_tier")
+    if name not in TIERS or model_name or PINNED_MODEL or DEFAULT_TIER in TIERS:
+        return True
+    duration = result.get("metadata", {}).get("duration")
+    wanted = _tier_within(duration, 0, LATENCY_TARGET_SECONDS) if duration else TIERS["balanced"]
+    order = list(TIERS)
+    return order.index(name) <= order.index(wanted.name)
+
+
+def tier_setting(model_name=None):
+    """Label for the configured policy, used in cache keys."""
+    model_name = model_name or PINNED_MODEL
+    return model_name if model_name else DEFAULT_TIER
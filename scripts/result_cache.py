@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("CLIPIFY_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "clipify"))
+DEFAULT_MAX_BYTES = int(float(os.getenv("RESULT_CACHE_MAX_MB", "512")) * 1024 * 1024)
+DEFAULT_MAX_AGE = float(os.getenv("RESULT_CACHE_MAX_AGE_DAYS", "7")) * 86400
+
+
+class ResultCache:
+    """Persistent LRU store of analysis results keyed by video ID and pipeline version.
+
+    Results are stored as zlib-compressed JSON in a single SQLite file so the
+    cache can be shared by the API server and the CLI scripts.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.path = path or os.path.join(CACHE_DIR, "results.sqlite3")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " video_id TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " data BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " PRIMARY KEY (video_id, version))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._conn.commit()
+
+    def get(self, video_id, version):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, created FROM results WHERE video_id = ? AND version = ?",
+                (video_id, version),
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed = ? WHERE video_id = ? AND version = ?",
+                (now, video_id, version),
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, video_id, version, result):
+        data = zlib.compress(json.dumps(result, ensure_ascii=False, separators=(',', ':')).encode("utf-8"), 6)
+        if len(data) > self.max_bytes:
+            logger.warning(f"Result for {video_id} ({len(data)} bytes) exceeds cache size, not cached")
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (video_id, version, data, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, version, data, len(data), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        expired = self._conn.execute("DELETE FROM results WHERE created < ?", (now - self.max_age,)).rowcount
+        self.evictions += max(expired, 0)
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT video_id, version, size FROM results ORDER BY accessed ASC").fetchall()
+        for video_id, version, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM results WHERE video_id = ? AND version = ?", (video_id, version))
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def is_cacheable(result):
+    """Whether ``result`` may be served again for the same key.
+
+    Analyses degrade instead of failing on transient errors: metadata falls
+    back to a placeholder without a duration, and a swallowed transcription
+    error leaves an empty transcript. Those still report success but must be
+    redone next time, as must results whose Whisper tier was lowered for load.
+    """
+    if not result.get("success"):
+        return False
+    if not result.get("metadata", {}).get("duration") or not result.get("transcript"):
+        return False
+    return not result.get("stats", {}).get("whisper_tier_degraded")
+
+
+_default_cache = None
+
+
+def get_result_cache():
+    global _default_cache
+    if os.getenv("RESULT_CACHE", "1") == "0":
+        return None
+    if _default_cache is None:
+        try:
+            _default_cache = ResultCache()
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Result cache unavailable: {e}")
+            return None
+    return _default_cache
@@ -0,0 +1,97 @@
+import math
+import os
+import re
+from collections import Counter
+
+try:
+    from .chaptering import estimate_tokens, format_timestamp
+    from .transcript_index import TranscriptIndex
+except ImportError:
+    from chaptering import estimate_tokens, format_timestamp
+    from transcript_index import TranscriptIndex
+
+DEFAULT_WINDOW_SECONDS = float(os.getenv("RETRIEVAL_WINDOW_SECONDS", "60"))
+DEFAULT_WINDOW_OVERLAP = float(os.getenv("RETRIEVAL_WINDOW_OVERLAP", "20"))
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+WORD = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset("""
+a an and are as at be but by can did do does for from had has have how i if in is it its of on or so
+that the their them then there these they this to was we were what when where which who why will with
+you your about into just than too very video
+""".split())
+
+
+def tokenize(text):
+    return [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+class RetrievalIndex:
+    """BM25 index over overlapping time windows of one transcript.
+
+    Windows are ``window_seconds`` long and start every
+    ``window_seconds - overlap`` seconds, so an answer that straddles a window
+    boundary is still whole in one of them.
+    """
+
+    def __init__(self, segments, window_seconds=DEFAULT_WINDOW_SECONDS, overlap=DEFAULT_WINDOW_OVERLAP):
+        index = segments if isinstance(segments, TranscriptIndex) else TranscriptIndex(segments)
+        stride = max(1.0, window_seconds - overlap)
+        self.windows = []
+        if len(index):
+            last = max(index.ends)
+            start = 0.0
+            while start < last:
+                text = index.text_between(start, start + window_seconds, contained=False)
+                if text:
+                    self.windows.append({'start': start, 'end': min(start + window_seconds, last), 'text': text})
+                start += stride
+
+        self._terms = [Counter(tokenize(window['text'])) for window in self.windows]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        df = Counter(term for terms in self._terms for term in terms)
+        n = len(self.windows)
+        self._idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def __len__(self):
+        return len(self.windows)
+
+    def score(self, question):
+        query = set(tokenize(question)) & self._idf.keys()
+        scores = []
+        for terms, length in zip(self._terms, self._lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self._avg_length) if self._avg_length else BM25_K1
+            scores.append(sum(
+                self._idf[term] * terms[term] * (BM25_K1 + 1) / (terms[term] + norm)
+                for term in query if term in terms
+            ))
+        return scores
+
+    def top_windows(self, question, k=5, max_tokens=1500):
+        """The ``k`` best windows for ``question`` that fit in ``max_tokens``.
+
+        Windows overlapping one already chosen are skipped so the budget is
+        not spent on repeated text. Results come back in playback order.
+        """
+        scores = self.score(question)
+        chosen, used = [], 0
+        for i in sorted(range(len(scores)), key=lambda i: -scores[i]):
+            if len(chosen) >= k or scores[i] <= 0:
+                break
+            window = self.windows[i]
+            if any(window['start'] < other['end'] and other['start'] < window['end'] for other in chosen):
+                continue
+            tokens = estimate_tokens(window['text'])
+            if used + tokens > max_tokens:
+                continue
+            chosen.append(dict(window, score=round(scores[i], 4), tokens=tokens))
+            used += tokens
+        return sorted(chosen, key=lambda w: w['start'])
+
+
+def format_context(windows):
+    return '\n\n'.join(
+        f"[{format_timestamp(w['start'])}-{format_timestamp(w['end'])}] {w['text']}" for w in windows
+    )
@@ -0,0 +1,255 @@
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+try:
+    from .result_cache import CACHE_DIR
+except ImportError:
+    from result_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+SCRATCH_ROOT = os.getenv("CLIPIFY_SCRATCH_DIR", os.path.join(CACHE_DIR, "work"))
+SCRATCH_MAX_BYTES = int(float(os.getenv("SCRATCH_MAX_MB", "4096")) * 1024 * 1024)
+# Working directories of live processes older than this are abandoned too
+# (without /proc only the pid is compared, and it may have been reused).
+SCRATCH_MAX_AGE_SECONDS = float(os.getenv("SCRATCH_MAX_AGE_HOURS", "12")) * 3600
+MEDIA_CACHE_ENABLED = os.getenv("MEDIA_CACHE", "1") != "0"
+
+
+def _safe(name):
+    return re.sub(r"[^\w.-]", "_", str(name))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _process_start(pid):
+    """Start time of ``pid`` in clock ticks since boot, or None without /proc.
+
+    A pid alone does not identify a process across restarts: in a container
+    the restarted server and its workers get the same small pids again.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name is parenthesized and may itself contain spaces
+    fields = stat[stat.rindex(")") + 2:].split()
+    return fields[19] if len(fields) > 19 else None
+
+
+def _owner_tag(pid=None):
+    """``<pid>.<start time>`` naming the process that owns a scratch entry."""
+    pid = pid or os.getpid()
+    start = _process_start(pid)
+    return f"{pid}.{start}" if start else str(pid)
+
+
+def _owner_alive(tag):
+    pid, _, start = tag.partition(".")
+    if not pid.isdigit() or int(pid) <= 0 or not _pid_alive(int(pid)):
+        return False
+    # Entries named before the start time was recorded only have the pid
+    return not start or _process_start(int(pid)) == start
+
+
+def _tree_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+class ScratchSpace:
+    """Disk space for downloaded media and intermediates under one byte quota.
+
+    ``scratch/<pid>.<start>-<token>/`` holds per-analysis working
+    directories; they are removed by ``release`` and, after a crash or
+    restart, by ``reclaim`` once the process that made them is gone. ``media/<video_id>/<format_id>.<ext>`` is a media cache
+    shared by every process, so re-analyzing a video reuses its download.
+    Cached media is evicted least recently used first (file mtimes are
+    touched on every hit) to keep the whole tree within ``quota_bytes``.
+    """
+
+    def __init__(self, root=SCRATCH_ROOT, quota_bytes=SCRATCH_MAX_BYTES, media_cache=MEDIA_CACHE_ENABLED):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.media_cache = media_cache
+        self.scratch_dir = os.path.join(root, "scratch")
+        self.media_dir = os.path.join(root, "media")
+        os.makedirs(self.scratch_dir, exist_ok=True)
+        os.makedirs(self.media_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._owner_pid = None
+        self._owner_name = None
+        self.reclaim()
+
+    # Working directories
+
+    def create(self):
+        path = os.path.join(self.scratch_dir, f"{self._owner()}-{uuid.uuid4().hex[:12]}")
+        os.makedirs(path)
+        return path
+
+    def _owner(self):
+        # Cached per pid: forked workers share this object with the parent
+        pid = os.getpid()
+        if self._owner_pid != pid:
+            self._owner_pid, self._owner_name = pid, _owner_tag(pid)
+        return self._owner_name
+
+    def release(self, path):
+        shutil.rmtree(path, ignore_errors=True)
+
+    def staging_path(self, suffix=""):
+        """A fresh file path in this process's staging directory."""
+        staging = os.path.join(self.scratch_dir, f"{self._owner()}-staging")
+        os.makedirs(staging, exist_ok=True)
+        return os.path.join(staging, uuid.uuid4().hex + suffix)
+
+    def reclaim(self):
+        """Remove working directories left behind by processes that died."""
+        now = time.time()
+        reclaimed = 0
+        for entry in os.scandir(self.scratch_dir):
+            owner, _, _ = entry.name.partition("-")
+            try:
+                owner_alive = _owner_alive(owner)
+                stale = now - entry.stat().st_mtime > SCRATCH_MAX_AGE_SECONDS
+            except FileNotFoundError:
+                continue
+            if owner_alive and not stale:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+            reclaimed += 1
+        if reclaimed:
+            logger.info(f"Reclaimed {reclaimed} abandoned scratch entries")
+        return reclaimed
+
+    # Media cache
+
+    def _media_entries(self):
+        entries = []
+        for video in os.scandir(self.media_dir):
+            if not video.is_dir(follow_symlinks=False):
+                continue
+            for item in os.scandir(video.path):
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+        return entries
+
+    def get_media(self, video_id, format_id):
+        """Path of the cached ``(video_id, format_id)`` download, or None."""
+        if not self.media_cache or not video_id or not format_id:
+            return None
+        directory = os.path.join(self.media_dir, _safe(video_id))
+        prefix = _safe(format_id) + "."
+        try:
+            names = [name for name in os.listdir(directory) if name.startswith(prefix)]
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                continue
+            with self._lock:
+                self.hits += 1
+            return path
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put_media(self, video_id, format_id, path, ext):
+        """Move a finished download into the media cache and return its new path.
+
+        Without a usable key, or with the cache disabled, ``path`` is left
+        where it is.
+        """
+        if not self.media_cache or not video_id or not format_id:
+            return path
+        size = os.path.getsize(path)
+        if size > self.quota_bytes:
+            return path
+        # The file already counts against the quota from its staging place
+        self.evict()
+        directory = os.path.join(self.media_dir, _safe(video_id))
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, f"{_safe(format_id)}.{_safe(ext or 'bin')}")
+        os.replace(path, target)
+        logger.info(f"Cached media {video_id}/{format_id} ({size / 1e6:.1f} MB)")
+        return target
+
+    def usage(self):
+        return {"media_bytes": _tree_size(self.media_dir), "scratch_bytes": _tree_size(self.scratch_dir)}
+
+    def evict(self, incoming=0):
+        """Drop least recently used media until ``incoming`` more bytes fit in the quota."""
+        usage = self.usage()
+        excess = usage["media_bytes"] + usage["scratch_bytes"] + incoming - self.quota_bytes
+        if excess <= 0:
+            return 0
+        freed = 0
+        for _, size, path in sorted(self._media_entries()):
+            if freed >= excess:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            freed += size
+            with self._lock:
+                self.evictions += 1
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+        logger.info(f"Evicted {freed / 1e6:.1f} MB of cached media")
+        return freed
+
+    def stats(self):
+        with self._lock:
+            counters = {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+        return {**counters, **self.usage(), "quota_bytes": self.quota_bytes}
+
+
+_default_space = None
+_default_lock = threading.Lock()
+
+
+def get_scratch_space():
+    global _default_space
+    with _default_lock:
+        if _default_space is None:
+            _default_space = ScratchSpace()
+    return _default_space
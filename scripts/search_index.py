@@ -0,0 +1,171 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    from .result_cache import CACHE_DIR
+except ImportError:
+    from result_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_TOKENS = 16
+QUERY_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query, operator="AND"):
+    """Turn free text into an FTS5 MATCH expression.
+
+    Every term is quoted so user input can never be parsed as FTS5 syntax.
+    """
+    terms = QUERY_TERM.findall(query)
+    return f" {operator} ".join(f'"{term}"' for term in terms)
+
+
+class SearchIndex:
+    """On-disk inverted index over the transcript segments of analyzed videos.
+
+    Built on SQLite FTS5: each posting is a (video_id, segment start) row in
+    ``postings`` and an external-content FTS table indexes its text, so hits
+    are ranked with FTS5's built-in BM25 and a video's postings can be
+    replaced without scanning the whole index. Videos are (re)indexed
+    incrementally as analyses finish.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, "search.sqlite3")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " id INTEGER PRIMARY KEY,"
+            " video_id TEXT NOT NULL,"
+            " start REAL NOT NULL,"
+            " end REAL NOT NULL,"
+            " text TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS postings_video ON postings (video_id)")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5("
+            " text, content = 'postings', content_rowid = 'id',"
+            " tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS videos ("
+            " video_id TEXT PRIMARY KEY,"
+            " title TEXT NOT NULL,"
+            " segment_count INTEGER NOT NULL,"
+            " indexed REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def has_video(self, video_id):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM videos WHERE video_id = ?", (video_id,)).fetchone() is not None
+
+    def add_video(self, video_id, title, segments):
+        """Replace the postings for ``video_id`` with ``segments``."""
+        rows = [
+            (video_id, float(seg["start"]), float(seg["end"]), seg["text"].strip())
+            for seg in segments
+            if seg.get("text", "").strip()
+        ]
+        with self._lock:
+            # External-content FTS tables need the old text to drop postings
+            self._conn.execute(
+                "INSERT INTO segments (segments, rowid, text)"
+                " SELECT 'delete', id, text FROM postings WHERE video_id = ?",
+                (video_id,),
+            )
+            self._conn.execute("DELETE FROM postings WHERE video_id = ?", (video_id,))
+            for row in rows:
+                rowid = self._conn.execute(
+                    "INSERT INTO postings (video_id, start, end, text) VALUES (?, ?, ?, ?)", row
+                ).lastrowid
+                self._conn.execute("INSERT INTO segments (rowid, text) VALUES (?, ?)", (rowid, row[3]))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, title, segment_count, indexed) VALUES (?, ?, ?, ?)",
+                (video_id, title or "", len(rows), time.time()),
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def add_result(self, video_id, result):
+        if not result.get("success") or not result.get("transcript"):
+            return 0
+        return self.add_video(video_id, (result.get("metadata") or {}).get("title", ""), result["transcript"])
+
+    def search(self, query, limit=20, video_id=None):
+        """Ranked ``(video, timestamp, snippet)`` hits for ``query``.
+
+        All terms must match a segment; if nothing does, any term may.
+        """
+        for operator in ("AND", "OR"):
+            match = build_match_query(query, operator)
+            if not match:
+                return []
+            hits = self._search(match, limit, video_id)
+            if hits:
+                return hits
+        return []
+
+    def _search(self, match, limit, video_id):
+        sql = (
+            "SELECT p.video_id, v.title, p.start, p.end,"
+            f" snippet(segments, 0, '<b>', '</b>', '…', {SNIPPET_TOKENS}), bm25(segments)"
+            " FROM segments JOIN postings p ON p.id = segments.rowid"
+            " LEFT JOIN videos v ON v.video_id = p.video_id"
+            " WHERE segments MATCH ?"
+        )
+        params = [match]
+        if video_id:
+            sql += " AND p.video_id = ?"
+            params.append(video_id)
+        sql += " ORDER BY bm25(segments) LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {
+                "video_id": vid,
+                "title": title or "",
+                "start": start,
+                "end": end,
+                "snippet": snippet,
+                # bm25() is lower-is-better; flip it so higher scores rank first
+                "score": -score,
+            }
+            for vid, title, start, end, snippet, score in rows
+        ]
+
+    def stats(self):
+        with self._lock:
+            videos, segments = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(segment_count), 0) FROM videos"
+            ).fetchone()
+        return {"videos": videos, "segments": segments}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_index = None
+
+
+def get_search_index():
+    global _default_index
+    if os.getenv("SEARCH_INDEX", "1") == "0":
+        return None
+    if _default_index is None:
+        try:
+            _default_index = SearchIndex()
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Search index unavailable: {e}")
+            return None
+    return _default_index
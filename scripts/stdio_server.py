@@ -0,0 +1,91 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Requests analyzed at once; stage limits decide how much of each overlaps
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("SERVE_MAX_CONCURRENCY", "4"))
+
+
+def claim_stdout():
+    """Keep the real stdout for protocol lines and send everything else that
+    writes to fd 1 (prints, yt-dlp progress, native libraries) to stderr."""
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8", buffering=1)
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    return protocol
+
+
+class StdioServer:
+    """Long-lived worker speaking newline-delimited JSON over stdin/stdout.
+
+    Each request line is ``{"id": ..., "url": ...}`` plus any fields the
+    handler understands; ``{"id": ..., "type": "ping"}`` is answered with a
+    ``pong``. Every response line carries the request ``id`` and a ``type``
+    of ``result`` or ``error``, in completion order. A ``ready`` line is
+    written once ``preload`` has finished; EOF on stdin drains the requests
+    in flight and exits.
+    """
+
+    def __init__(self, handle, name, preload=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.handle = handle
+        self.name = name
+        self.preload = preload
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._out = None
+
+    def send(self, message):
+        self._out.write(json.dumps(message, ensure_ascii=False) + "\n")
+
+    async def _run(self, request, semaphore):
+        request_id = request.get("id")
+        try:
+            async with semaphore:
+                result = await self.handle(request)
+            self.send({"id": request_id, "type": "result", "result": result})
+        except Exception as e:
+            logger.exception(f"Request {request_id} failed")
+            self.send({"id": request_id, "type": "error", "error": str(e)})
+        finally:
+            self.in_flight -= 1
+
+    async def serve(self):
+        self._out = claim_stdout()
+        if self.preload is not None:
+            await asyncio.to_thread(self.preload)
+        self.send({"type": "ready", "name": self.name, "pid": os.getpid()})
+        logger.info(f"{self.name} serving requests on stdin")
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = set()
+        while True:
+            line = await asyncio.to_thread(sys.stdin.readline)
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                self.send({"id": None, "type": "error", "error": f"Invalid request: {e}"})
+                continue
+            if request.get("type") == "ping":
+                self.send({"id": request.get("id"), "type": "pong", "in_flight": self.in_flight})
+                continue
+            # Requests already admitted are ahead of this one in the queue
+            request["queue_depth"] = self.in_flight
+            self.in_flight += 1
+            task = asyncio.create_task(self._run(request, semaphore))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        self._out.close()
@@ -0,0 +1,155 @@
+import math
+
+import numpy as np
+
+try:
+    from .chaptering import MIN_CHAPTER_SECONDS, target_chapter_count
+    from .retrieval import STOPWORDS, tokenize
+except ImportError:
+    from chaptering import MIN_CHAPTER_SECONDS, target_chapter_count
+    from retrieval import STOPWORDS, tokenize
+
+# TextTiling parameters: the transcript is cut into pseudo-sentences of
+# SEQUENCE_TOKENS tokens, and each gap between two of them is scored by the
+# similarity of the BLOCK_SEQUENCES pseudo-sentences on either side.
+SEQUENCE_TOKENS = 20
+BLOCK_SEQUENCES = 6
+SMOOTHING_WIDTH = 3
+LABEL_KEYWORDS = 5
+# Spoken filler that says nothing about a topic
+FILLER = frozenset("""
+all also because been being could going gonna got here know like look make much now okay one really
+right see should some something still such thing things think through want well would yeah yes
+""".split())
+
+
+def _terms(text):
+    return [word for word in tokenize(text) if len(word) > 2 and not word.isdigit() and word not in FILLER]
+
+
+def _pseudo_sentences(segments):
+    """Token sequences of SEQUENCE_TOKENS terms with the start time of each."""
+    sequences, starts, current, start = [], [], [], None
+    for segment in segments:
+        for term in _terms(segment['text']):
+            if start is None:
+                start = segment['start']
+            current.append(term)
+            if len(current) == SEQUENCE_TOKENS:
+                sequences.append(current)
+                starts.append(start)
+                current, start = [], None
+    if current:
+        sequences.append(current)
+        starts.append(start)
+    return sequences, starts
+
+
+def gap_cohesion(sequences, block=BLOCK_SEQUENCES):
+    """Cosine similarity of the term vectors of the ``block`` pseudo-sentences
+    before and after each gap; ``result[i]`` scores the gap before sequence ``i + 1``."""
+    vocabulary = {}
+    rows, cols = [], []
+    for i, sequence in enumerate(sequences):
+        for term in sequence:
+            rows.append(i)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+    counts = np.zeros((len(sequences) + 1, len(vocabulary)), np.float32)
+    np.add.at(counts, (np.array(rows) + 1, np.array(cols)), 1.0)
+    cumulative = np.cumsum(counts, axis=0)
+
+    gaps = np.arange(1, len(sequences))
+    left = cumulative[gaps] - cumulative[np.maximum(gaps - block, 0)]
+    right = cumulative[np.minimum(gaps + block, len(sequences))] - cumulative[gaps]
+    norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+    return np.einsum('ij,ij->i', left, right) / np.maximum(norms, 1e-9)
+
+
+def depth_scores(cohesion):
+    """How far each gap's cohesion dips below the peaks on both sides of it."""
+    depths = np.zeros_like(cohesion)
+    for i, value in enumerate(cohesion):
+        left = i
+        while left > 0 and cohesion[left - 1] >= cohesion[left]:
+            left -= 1
+        right = i
+        while right < len(cohesion) - 1 and cohesion[right + 1] >= cohesion[right]:
+            right += 1
+        depths[i] = cohesion[left] - value + cohesion[right] - value
+    return depths
+
+
+def _keywords(chapter_terms, all_terms):
+    # Terms frequent in this chapter but rare in the others
+    n = len(all_terms)
+    df = {}
+    for terms in all_terms:
+        for term in set(terms):
+            df[term] = df.get(term, 0) + 1
+    counts = {}
+    for term in chapter_terms:
+        counts[term] = counts.get(term, 0) + 1
+    scored = sorted(counts, key=lambda term: (-counts[term] * math.log((n + 1) / df[term]), term))
+    return [term for term in scored if term not in STOPWORDS][:LABEL_KEYWORDS]
+
+
+def _label(keywords):
+    text = f"{', '.join(keywords[:-1])} and {keywords[-1]}" if len(keywords) > 1 else ''.join(keywords)
+    return text[:1].upper() + text[1:]
+
+
+def cohesion_sections(segments, duration=None, max_chapters=None):
+    """Chapters from lexical cohesion alone (TextTiling), with keyword labels.
+
+    Boundaries go at the deepest cohesion valleys that are deeper than the
+    mean depth less half a standard deviation, at least
+    ``MIN_CHAPTER_SECONDS`` apart. Returns sections shaped like
+    ``map_reduce_chapters`` output plus ``key_topics``, or ``[]`` when the
+    transcript is too short or shows no topic shift.
+    """
+    segments = [segment for segment in segments if segment['text'].strip()]
+    sequences, starts = _pseudo_sentences(segments)
+    if len(sequences) < 2 * BLOCK_SEQUENCES:
+        return []
+    # Metadata durations are whole seconds and can end before the last segment
+    duration = max(float(duration or 0), segments[-1]['end'])
+    max_chapters = max_chapters or target_chapter_count(duration)
+
+    cohesion = gap_cohesion(sequences)
+    if SMOOTHING_WIDTH > 1:
+        padded = np.pad(cohesion, SMOOTHING_WIDTH // 2, mode='edge')
+        cohesion = np.convolve(padded, np.ones(SMOOTHING_WIDTH) / SMOOTHING_WIDTH, mode='valid')
+    depths = depth_scores(cohesion)
+    cutoff = depths.mean() - depths.std() / 2
+
+    boundaries = []
+    for gap in np.argsort(-depths, kind='stable'):
+        if depths[gap] <= max(cutoff, 0.0) or len(boundaries) >= max_chapters - 1:
+            break
+        at = starts[gap + 1]
+        if at < MIN_CHAPTER_SECONDS or duration - at < MIN_CHAPTER_SECONDS:
+            continue
+        if all(abs(at - other) >= MIN_CHAPTER_SECONDS for other in boundaries):
+            boundaries.append(at)
+    if not boundaries:
+        return []
+
+    edges = [0.0] + sorted(boundaries) + [duration]
+    chapter_terms = [[] for _ in range(len(edges) - 1)]
+    for sequence, start in zip(sequences, starts):
+        chapter = min(int(np.searchsorted(edges, start, side='right')) - 1, len(chapter_terms) - 1)
+        chapter_terms[chapter].extend(sequence)
+
+    sections = []
+    for i, terms in enumerate(chapter_terms):
+        keywords = _keywords(terms, chapter_terms)
+        label = _label(keywords[:3]) or f"Part {i + 1}"
+        sections.append({
+            'start': edges[i],
+            'end': edges[i + 1],
+            'title': label,
+            'summary': f"Covers {', '.join(keywords)}." if keywords else '',
+            'main_topic': keywords[0] if keywords else label,
+            'key_topics': keywords,
+        })
+    return sections
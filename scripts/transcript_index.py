@@ -0,0 +1,78 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import accumulate
+
+
+class TranscriptIndex:
+    """Sorted start/end arrays over transcript segments for O(log n + k)
+    time-range lookups."""
+
+    def __init__(self, segments):
+        if hasattr(segments, 'starts') and all(a <= b for a, b in zip(segments.starts, segments.starts[1:])):
+            # Columnar transcripts already hold the time arrays; index them in
+            # place and materialize segment dicts only for returned hits.
+            self.segments = segments
+            self.starts = segments.starts
+            self.ends = segments.ends
+        else:
+            self.segments = sorted(segments, key=lambda seg: seg['start'])
+            self.starts = [seg['start'] for seg in self.segments]
+            self.ends = [seg['end'] for seg in self.segments]
+        # Running maximum of end times is non-decreasing, so it can be
+        # bisected to find the first segment that could overlap a range even
+        # when individual segments overlap each other.
+        self._max_ends = list(accumulate(self.ends, max))
+
+    def __len__(self):
+        return len(self.segments)
+
+    def range_indices(self, start, end, contained=True):
+        """Indices of segments inside ``[start, end]``.
+
+        With ``contained`` only segments lying entirely within the range are
+        returned; otherwise any segment overlapping it is.
+        """
+        if contained:
+            lo = bisect_left(self.starts, start)
+            hi = bisect_right(self.starts, end)
+            return [i for i in range(lo, hi) if self.ends[i] <= end]
+        lo = bisect_right(self._max_ends, start)
+        hi = bisect_left(self.starts, end)
+        return [i for i in range(lo, hi) if self.ends[i] > start]
+
+    def segments_between(self, start, end, contained=False):
+        return [self.segments[i] for i in self.range_indices(start, end, contained)]
+
+    def text_between(self, start, end, contained=True):
+        text = getattr(self.segments, 'text', None) or (lambda i: self.segments[i]['text'])
+        return ' '.join(text(i).strip() for i in self.range_indices(start, end, contained))
+
+
+class TranscriptIndexCache:
+    """Keeps the most recently used indexes so repeated range queries for the
+    same video skip rebuilding. Safe to share between threads; indexes are
+    built outside the lock, so concurrent misses on one key may both build."""
+
+    def __init__(self, maxsize=64, factory=TranscriptIndex):
+        self.maxsize = maxsize
+        self.factory = factory
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load_segments):
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        segments = load_segments()
+        if segments is None:
+            return None
+        index = self.factory(segments)
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            if len(self._indexes) > self.maxsize:
+                self._indexes.popitem(last=False)
+        return index
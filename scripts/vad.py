@@ -0,0 +1,130 @@
+import logging
+import os
+
+import numpy as np
+
+try:
+    from .audio_ingest import SAMPLE_RATE
+except ImportError:
+    from audio_ingest import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+VAD_ENABLED = os.getenv("VAD", "1") != "0"
+# Only silences at least this long are cut out; shorter pauses stay so
+# Whisper keeps the context across sentence breaks.
+VAD_MIN_SILENCE_SECONDS = float(os.getenv("VAD_MIN_SILENCE_SECONDS", "1.0"))
+
+FRAME_MS = 30
+PAD_SECONDS = 0.2
+MIN_SPEECH_SECONDS = 0.25
+# A frame is speech when it is this far above the noise floor (the 10th
+# percentile level), capped at this far below the loud (90th percentile)
+# level so uniformly loud audio is not split, and never below the absolute
+# floor.
+MARGIN_DB = 10.0
+DYNAMIC_RANGE_DB = 25.0
+ABSOLUTE_FLOOR_DB = -60.0
+
+
+def frame_rms(pcm, frame_len):
+    n_frames = len(pcm) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, np.float32)
+    frames = pcm[:n_frames * frame_len].reshape(n_frames, frame_len)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+
+def _runs(mask):
+    """``(start, end)`` frame indices of the True runs in ``mask``."""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_regions(pcm, sample_rate=SAMPLE_RATE, min_silence_seconds=VAD_MIN_SILENCE_SECONDS):
+    """``(start_sample, end_sample)`` spans of ``pcm`` that contain speech.
+
+    Energy based: frames well above the recording's own noise floor are
+    speech, padded by ``PAD_SECONDS`` on both sides; gaps shorter than
+    ``min_silence_seconds`` are bridged and blips shorter than
+    ``MIN_SPEECH_SECONDS`` dropped.
+    """
+    frame_len = int(sample_rate * FRAME_MS / 1000)
+    energy = frame_rms(pcm, frame_len)
+    if not len(energy):
+        return [(0, len(pcm))] if len(pcm) else []
+    level = 20 * np.log10(energy + 1e-10)
+    floor, loud = np.percentile(level, [10, 90])
+    threshold = max(ABSOLUTE_FLOOR_DB, min(floor + MARGIN_DB, loud - DYNAMIC_RANGE_DB))
+    speech = level > threshold
+
+    frame_seconds = FRAME_MS / 1000
+    pad = int(round(PAD_SECONDS / frame_seconds))
+    if pad:
+        # Dilate: a frame is kept when any speech frame is within ``pad``
+        kernel = np.ones(2 * pad + 1, np.int32)
+        speech = np.convolve(speech.astype(np.int32), kernel, mode='same') > 0
+
+    # Bridge silences too short to be worth cutting
+    starts, ends = _runs(~speech)
+    short = (ends - starts) * frame_seconds < min_silence_seconds
+    for start, end in zip(starts[short], ends[short]):
+        speech[start:end] = True
+
+    starts, ends = _runs(speech)
+    keep = (ends - starts) * frame_seconds >= MIN_SPEECH_SECONDS
+    regions = [(int(start) * frame_len, int(end) * frame_len) for start, end in zip(starts[keep], ends[keep])]
+    if regions and regions[-1][1] == len(energy) * frame_len:
+        # Keep the partial frame at the end with the last region
+        regions[-1] = (regions[-1][0], len(pcm))
+    return regions
+
+
+class SpeechMap:
+    """PCM with its silences cut out, and the way back to the original timeline.
+
+    ``pcm`` is what the transcriber sees; ``remap`` moves segment timestamps
+    from it onto the original audio.
+    """
+
+    def __init__(self, pcm, regions, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.total_seconds = len(pcm) / sample_rate
+        if len(regions) == 1 and regions[0] == (0, len(pcm)):
+            self.pcm = pcm
+        else:
+            self.pcm = np.concatenate([pcm[start:end] for start, end in regions]) if regions else pcm[:0]
+        lengths = np.array([end - start for start, end in regions], np.int64)
+        self._compact_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) / sample_rate if regions else np.zeros(1)
+        self._original_starts = np.array([start for start, _ in regions], np.float64) / sample_rate if regions else np.zeros(1)
+        self.speech_seconds = len(self.pcm) / sample_rate
+
+    @property
+    def skipped_seconds(self):
+        return self.total_seconds - self.speech_seconds
+
+    def _map(self, seconds, side):
+        # Ends that fall exactly on a join belong to the region before it
+        i = max(int(np.searchsorted(self._compact_starts, seconds, side=side)) - 1, 0)
+        return float(self._original_starts[i] + seconds - self._compact_starts[i])
+
+    def remap(self, segments, offset=0.0):
+        """Shift segment ``start``/``end`` (and Whisper's ``seek``) in place
+        from compacted time to original time plus ``offset``; returns them."""
+        for segment in segments:
+            start = self._map(segment['start'], 'right') + offset
+            if 'seek' in segment:
+                segment['seek'] += int((start - segment['start']) * 100)
+            segment['end'] = max(self._map(segment['end'], 'left') + offset, start)
+            segment['start'] = start
+        return segments
+
+
+def detect_speech(pcm, sample_rate=SAMPLE_RATE, enabled=VAD_ENABLED):
+    """``SpeechMap`` of ``pcm``; with VAD disabled it passes ``pcm`` through."""
+    regions = speech_regions(pcm, sample_rate) if enabled else [(0, len(pcm))]
+    speech = SpeechMap(pcm, regions, sample_rate)
+    if speech.skipped_seconds > 0:
+        logger.info(f"VAD: {speech.speech_seconds:.0f}s of speech in {speech.total_seconds:.0f}s of audio "
+                    f"({len(regions)} regions)")
+    return speech
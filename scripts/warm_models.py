@@ -0,0 +1,28 @@
+"""Loads the default Whisper tier when imported.
+
+Only the fork server imports this module (see ``forkserver.PRELOAD_MODULES``),
+so every worker forked from it starts with the weights already in memory,
+shared copy-on-write with its siblings.
+"""
+import logging
+
+try:
+    from .quality_tiers import choose_tier
+    from .whisper_models import get_whisper_model
+except ImportError:
+    from quality_tiers import choose_tier
+    from whisper_models import get_whisper_model
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    tier = choose_tier(None)
+    try:
+        get_whisper_model(tier.model, tier.compute_type)
+    except Exception as e:
+        # Workers load the model themselves; the fork server must survive
+        logger.warning(f"Could not preload Whisper {tier.model}/{tier.compute_type}: {e}")
+
+
+preload()
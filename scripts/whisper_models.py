@@ -0,0 +1,93 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+
+# Loaded models are kept for the lifetime of the process so that repeated
+# transcriptions (CLI reuse, pool workers) never pay the weight load twice.
+_models = {}
+_lock = threading.Lock()
+# Compute type each loaded model really runs with, by model key: int8 falls
+# back to float32 when quantization does not apply, and CTranslate2 resolves
+# "default" and types the hardware lacks.
+_compute_types = {}
+
+
+def _quantize_int8(model):
+    """Dynamic int8 quantization of the Linear layers, which hold most of the
+    weights and FLOPs; activations stay float32. Returns the quantized model
+    and the number of layers that were swapped."""
+    import torch
+    import whisper.model
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicLinear
+    # Whisper's Linear subclass only overrides forward() to cast the weights
+    # to the input dtype. quantize_dynamic matches exact module types, so it
+    # would skip every one of them; on CPU float32 the plain forward is the
+    # same, so they are retyped to nn.Linear first.
+    whisper_linear = getattr(whisper.model, "Linear", None)
+    for module in model.modules():
+        if whisper_linear is not None and type(module) is whisper_linear:
+            module.__class__ = torch.nn.Linear
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model, sum(isinstance(module, DynamicLinear) for module in model.modules())
+
+
+def get_whisper_model(name=None, compute_type="float32"):
+    name = name or DEFAULT_WHISPER_MODEL
+    key = ("whisper", name, compute_type)
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            import whisper
+            logger.info(f"Loading Whisper model ({name}, {compute_type})...")
+            start = time.time()
+            model = whisper.load_model(name)
+            effective = compute_type
+            if compute_type == "int8":
+                swapped = 0
+                if model.device.type == "cpu":
+                    model, swapped = _quantize_int8(model)
+                if swapped:
+                    logger.info(f"Quantized {swapped} Linear layers of Whisper ({name}) to int8")
+                else:
+                    logger.warning(f"int8 quantization did not apply to Whisper ({name}); running float32")
+                    effective = "float32"
+            _compute_types[key] = effective
+            logger.info(f"Whisper model ({name}, {compute_type}) loaded in {time.time() - start:.1f}s")
+            _models[key] = model
+    return model
+
+
+def compute_type_in_use(name=None, compute_type="float32", backend="whisper", device="cpu"):
+    """Compute type the model loaded in this process actually runs with, or
+    None when it has not been loaded here."""
+    name = name or DEFAULT_WHISPER_MODEL
+    key = ("faster_whisper", name, device, compute_type) if backend == "faster_whisper" else ("whisper", name, compute_type)
+    with _lock:
+        return _compute_types.get(key)
+
+
+def get_faster_whisper_model(name=None, device="cpu", compute_type="default", cpu_threads=0):
+    # compute_type is passed to CTranslate2: "int8", "float32", "int8_float16", ...
+    name = name or DEFAULT_WHISPER_MODEL
+    key = ("faster_whisper", name, device, compute_type)
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            from faster_whisper import WhisperModel
+            logger.info(f"Loading Faster-Whisper model ({name}, {compute_type})...")
+            start = time.time()
+            model = WhisperModel(name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+            _compute_types[key] = getattr(model.model, "compute_type", compute_type)
+            logger.info(f"Faster-Whisper model ({name}) loaded in {time.time() - start:.1f}s")
+            _models[key] = model
+    return model
+
+
+def loaded_models():
+    with _lock:
+        return list(_models)
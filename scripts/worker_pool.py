@@ -0,0 +1,182 @@
+import asyncio
+import itertools
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .fast_video_analysis import FastVideoAnalyzer
+    from .forkserver import get_mp_context
+    from .quality_tiers import choose_tier
+    from .whisper_models import get_whisper_model
+except ImportError:
+    from fast_video_analysis import FastVideoAnalyzer
+    from forkserver import get_mp_context
+    from quality_tiers import choose_tier
+    from whisper_models import get_whisper_model
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = int(os.getenv("ANALYZER_WORKERS", "2"))
+
+
+def _init_worker(model_name):
+    # Runs once per worker process: the model stays resident for every job
+    # this worker picks up afterwards. Under the fork server the default tier
+    # is already loaded and this is a cache hit; other tiers load on first use.
+    tier = choose_tier(None, model_name=model_name)
+    get_whisper_model(tier.model, tier.compute_type)
+    logger.info(f"Analysis worker {os.getpid()} ready")
+
+
+_loop = None
+
+
+def _event_loop():
+    # One loop for the worker's lifetime, so pooled connections (the LLM
+    # client's keep-alive pool) carry over from one job to the next.
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+def _run_analysis(video_url, video_id, model_name, events=None, queue_depth=0, job_id=None):
+    # Events from every job share the pool's queue, tagged with the job id
+    on_event = (lambda event, data: events.put((job_id, (event, data)))) if events is not None else None
+    analyzer = FastVideoAnalyzer(whisper_model_name=model_name, queue_depth=queue_depth)
+    try:
+        return _event_loop().run_until_complete(analyzer.analyze_video(video_url, video_id, on_event=on_event))
+    finally:
+        analyzer.cleanup()
+        if events is not None:
+            events.put((job_id, None))
+
+
+class AnalysisWorkerPool:
+    """Long-lived worker processes that each keep a Whisper model loaded."""
+
+    def __init__(self, processes=None, model_name=None):
+        self.processes = processes or DEFAULT_WORKERS
+        self.model_name = model_name
+        self.active_jobs = 0
+        self._executor = None
+        self._manager = None
+        self._events = None
+        self._relay = None
+        self._job_ids = itertools.count()
+        # job id -> (loop, asyncio.Queue) of the jobs whose events are relayed
+        self._listeners = {}
+        self._listeners_lock = threading.Lock()
+
+    def start(self):
+        if self._executor is not None:
+            return
+        # Never a plain fork: the parent is an event-loop server with threads
+        # of its own. Workers come from the single-threaded fork server.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=get_mp_context(),
+            initializer=_init_worker,
+            initargs=(self.model_name,),
+        )
+        logger.info(f"Started analysis pool with {self.processes} workers")
+
+    async def warm_up(self):
+        # Workers are spawned on demand; submitting one probe per slot brings
+        # them all up (and loads their models) before the first real request.
+        loop = asyncio.get_running_loop()
+        probes = [loop.run_in_executor(self._executor, _worker_pid) for _ in range(self.processes)]
+        pids = await asyncio.gather(*probes)
+        logger.info(f"Analysis workers warm: {sorted(set(pids))}")
+
+    async def analyze(self, video_url, video_id, on_event=None):
+        if self._executor is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        self.active_jobs += 1
+        queue_depth = self.queue_depth
+        try:
+            if on_event is None:
+                return await loop.run_in_executor(
+                    self._executor, _run_analysis, video_url, video_id, self.model_name, None, queue_depth
+                )
+            # Stage events are produced inside the worker process and come
+            # back through the pool's managed queue as they arrive.
+            events = self._event_queue()
+            job_id = next(self._job_ids)
+            received = asyncio.Queue()
+            with self._listeners_lock:
+                self._listeners[job_id] = (loop, received)
+            try:
+                future = loop.run_in_executor(
+                    self._executor, _run_analysis, video_url, video_id, self.model_name, events, queue_depth, job_id
+                )
+
+                def end_on_failure(f):
+                    # A worker that dies never sends its end marker
+                    if f.cancelled() or f.exception() is not None:
+                        received.put_nowait(None)
+                future.add_done_callback(end_on_failure)
+                while (item := await received.get()) is not None:
+                    on_event(*item)
+                return await future
+            finally:
+                with self._listeners_lock:
+                    self._listeners.pop(job_id, None)
+        finally:
+            self.active_jobs -= 1
+
+    def _event_queue(self):
+        if self._manager is None:
+            self._manager = get_mp_context().Manager()
+            self._events = self._manager.Queue()
+            self._relay = threading.Thread(target=self._relay_events, args=(self._events,),
+                                           name="analysis-events", daemon=True)
+            self._relay.start()
+        return self._events
+
+    def _relay_events(self, events):
+        # The one thread blocked on the queue; it hands each event to the
+        # loop of the job that produced it.
+        while True:
+            try:
+                item = events.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            job_id, event = item
+            with self._listeners_lock:
+                listener = self._listeners.get(job_id)
+            if listener is None:
+                continue
+            loop, received = listener
+            try:
+                loop.call_soon_threadsafe(received.put_nowait, event)
+            except RuntimeError:
+                # The job's loop has closed
+                pass
+
+    @property
+    def queue_depth(self):
+        return max(0, self.active_jobs - self.processes)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("Analysis pool stopped")
+        if self._manager is not None:
+            self._events.put(None)
+            self._relay.join()
+            self._manager.shutdown()
+            self._manager = None
+            self._events = None
+            self._relay = None
@@ -0,0 +1,138 @@
+import copy
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+# YouTube stream URLs stay valid for about six hours; keep well inside that
+INFO_TTL_SECONDS = float(os.getenv("YTDL_INFO_TTL_SECONDS", "1800"))
+INFO_CACHE_SIZE = int(os.getenv("YTDL_INFO_CACHE_SIZE", "256"))
+# Callers pick their own format from info['formats']; the format chosen at
+# extraction time is only a fallback, so any single file will do.
+EXTRACT_FORMAT = 'best/bestaudio/worst'
+VIDEO_ID_RE = re.compile(r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|embed/|v/|shorts/)|youtu\.be/)([\w-]{11})')
+
+
+def info_key(url, proxy=None):
+    # Stream URLs are bound to the IP that extracted them, so the proxy is
+    # part of the key.
+    match = VIDEO_ID_RE.search(url)
+    return (match.group(1) if match else url, proxy)
+
+
+class InfoCache:
+    """LRU cache of yt-dlp info dicts that expire after ``ttl`` seconds.
+
+    Concurrent lookups of the same video wait for the one extraction in
+    flight instead of starting their own. Cached dicts are shared, so
+    callers must not modify them.
+    """
+
+    def __init__(self, ttl=INFO_TTL_SECONDS, maxsize=INFO_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, info = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return info
+
+    def get(self, key, extract):
+        with self._lock:
+            info = self._lookup(key)
+            if info is not None:
+                self.hits += 1
+                return info
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                info = self._lookup(key)
+                if info is not None:
+                    self.hits += 1
+                    return info
+                self.misses += 1
+            try:
+                info = extract()
+                with self._lock:
+                    self._entries[key] = (time.monotonic() + self.ttl, info)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+        return info
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def _ydl_opts(proxy=None, **extra):
+    opts = {'quiet': True, 'no_warnings': True, 'noprogress': True, **extra}
+    if proxy:
+        opts['proxy'] = proxy
+    return opts
+
+
+def _extract(url, proxy):
+    start = time.perf_counter()
+    with yt_dlp.YoutubeDL(_ydl_opts(proxy, format=EXTRACT_FORMAT)) as ydl:
+        info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+    logger.info(f"Extracted info for {url} in {time.perf_counter() - start:.1f}s")
+    return info
+
+
+def extract_info(url, proxy=None):
+    """Info dict for ``url`` with every available format, extracted at most
+    once per ``INFO_TTL_SECONDS``."""
+    cache = get_info_cache()
+    if cache is None:
+        return _extract(url, proxy)
+    return cache.get(info_key(url, proxy), lambda: _extract(url, proxy))
+
+
+def select_format(info, format_spec, proxy=None):
+    """Apply a yt-dlp format spec to an extracted info dict without refetching it."""
+    with yt_dlp.YoutubeDL(_ydl_opts(proxy, format=format_spec)) as ydl:
+        return ydl.process_ie_result(copy.deepcopy(info), download=False)
+
+
+def download_info(info, ydl_opts):
+    """Download the format ``ydl_opts`` selects from an extracted info dict.
+
+    Only the media is fetched; the watch page and player are not parsed again.
+    """
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.process_ie_result(copy.deepcopy(info), download=True)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_info_cache():
+    """Process-wide cache, or None when ``YTDL_INFO_TTL_SECONDS=0``."""
+    global _cache
+    if INFO_TTL_SECONDS <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = InfoCache()
+    return _cache
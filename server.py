@@ -1,13 +1,82 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
+import json
+import logging
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from scripts.fast_video_analysis import FastVideoAnalyzer
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from scripts.retrieval import RetrievalIndex, format_context
+from scripts.batch import DEFAULT_MAX_IN_FLIGHT, expand_playlists, run_batch
+from scripts.event_stream import replay_events
+from scripts.fast_video_analysis import ANALYSIS_STAGES, cache_version, extract_video_id
+from scripts.jobs import JobManager
+from scripts.metrics import REGISTRY, Gauge, record_analysis
+from scripts.quality_tiers import cached_tier_current
+from scripts.result_cache import get_result_cache, is_cacheable
+from scripts.scratch_space import get_scratch_space
+from scripts.search_index import get_search_index
+from scripts.transcript_index import TranscriptIndexCache
+from scripts.worker_pool import AnalysisWorkerPool
 from dotenv import load_dotenv
 import os
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+pool = AnalysisWorkerPool()
+
+JOB_COUNTS = REGISTRY.register(Gauge("clipify_jobs", "Analysis job counters", labels=("kind",)))
+CACHE_COUNTS = REGISTRY.register(Gauge("clipify_result_cache", "Result cache counters", labels=("kind",)))
+POOL_ACTIVE = REGISTRY.register(Gauge("clipify_pool_active_jobs", "Analyses currently assigned to pool workers"))
+
+async def run_analysis(url, video_id, emit=None):
+    cache = get_result_cache()
+    version = cache_version(pool.model_name)
+    cached = cache.get(video_id, version) if cache else None
+    if cached is not None and not cached_tier_current(cached, pool.model_name):
+        cached = None
+    if cached is not None:
+        cached["cached"] = True
+        record_analysis(cached, cached=True)
+        if emit:
+            replay_events(cached, emit, jobs.stages)
+        await index_result(video_id, cached, only_missing=True)
+        return cached
+    result = await pool.analyze(url, video_id, on_event=emit)
+    record_analysis(result)
+    if cache and is_cacheable(result):
+        cache.put(video_id, version, result)
+    await index_result(video_id, result)
+    return result
+
+async def index_result(video_id, result, only_missing=False):
+    index = get_search_index()
+    if index is None or (only_missing and index.has_video(video_id)):
+        return
+    try:
+        await asyncio.to_thread(index.add_result, video_id, result)
+    except Exception:
+        logger.warning(f"Search indexing failed for {video_id}", exc_info=True)
+
+transcript_indexes = TranscriptIndexCache()
+retrieval_indexes = TranscriptIndexCache(factory=RetrievalIndex)
+
+jobs = JobManager(run_analysis, stages=ANALYSIS_STAGES)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load Whisper once per worker at startup instead of once per request
+    pool.start()
+    await pool.warm_up()
+    yield
+    jobs.shutdown()
+    pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -16,11 +85,172 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class AnalyzeRequest(BaseModel):
+    url: str
+
+class BatchRequest(BaseModel):
+    urls: list[str]
+
+class RetrieveRequest(BaseModel):
+    question: str
+    video_id: Optional[str] = None
+    transcript: Optional[list] = None
+    k: int = 5
+    max_tokens: int = 1500
+
 @app.get("/analyze")
 async def analyze(url: str):
     try:
-        analyzer = FastVideoAnalyzer()
-        result = await analyzer.analyze_video(url)
-        return result
+        video_id = extract_video_id(url)
+        if not video_id:
+            return {"error": "Invalid YouTube URL"}
+        # Goes through the job manager so concurrent requests for the same
+        # video share one pipeline run.
+        job = jobs.submit(url, video_id)
+        await job.wait()
+        return job.result if job.result is not None else {"error": job.error}
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+@app.get("/stats")
+async def stats():
+    cache = get_result_cache()
+    index = get_search_index()
+    return {
+        "jobs": jobs.stats(),
+        "cache": cache.stats() if cache else None,
+        "search": index.stats() if index else None,
+        # Disk use only: hit counters live in the worker processes
+        "scratch": await asyncio.to_thread(get_scratch_space().usage),
+        "pool": {"workers": pool.processes, "active_jobs": pool.active_jobs},
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    for kind, value in jobs.stats().items():
+        JOB_COUNTS.set(value, kind=kind)
+    cache = get_result_cache()
+    if cache:
+        for kind, value in cache.stats().items():
+            CACHE_COUNTS.set(value, kind=kind)
+    POOL_ACTIVE.set(pool.active_jobs)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/transcript/{video_id}")
+async def transcript_range(video_id: str, start: float = 0.0, end: Optional[float] = None, contained: bool = False):
+    # Serves slices of an already analyzed video's transcript
+    if end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    cache = get_result_cache()
+    if cache is None:
+        raise HTTPException(status_code=503, detail="Result cache disabled")
+    version = cache_version(pool.model_name)
+
+    def load_segments():
+        result = cache.get(video_id, version)
+        return result.get("transcript", []) if result else None
+
+    # Reading the cache and building the index both block; keep them off the loop
+    index = await asyncio.to_thread(transcript_indexes.get, (video_id, version), load_segments)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Video has not been analyzed")
+    segments = index.segments_between(start, float("inf") if end is None else end, contained)
+    return {
+        "video_id": video_id,
+        "start": start,
+        "end": end,
+        "segments": segments,
+        "text": " ".join(seg["text"].strip() for seg in segments),
+    }
+
+@app.post("/retrieve")
+async def retrieve(request: RetrieveRequest):
+    # Top-k transcript windows for a chat question, within a token budget
+    index = None
+    if request.video_id:
+        cache = get_result_cache()
+        version = cache_version(pool.model_name)
+
+        def load_segments():
+            result = cache.get(request.video_id, version) if cache else None
+            return result.get("transcript", []) if result else None
+
+        index = await asyncio.to_thread(retrieval_indexes.get, (request.video_id, version), load_segments)
+    if index is None and request.transcript is not None:
+        index = await asyncio.to_thread(RetrievalIndex, request.transcript)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Video has not been analyzed and no transcript was given")
+    windows = index.top_windows(request.question, max(1, request.k), max(1, request.max_tokens))
+    return {
+        "video_id": request.video_id,
+        "windows": windows,
+        "context": format_context(windows),
+        "tokens": sum(w["tokens"] for w in windows),
+        "windows_indexed": len(index),
+    }
+
+@app.get("/search")
+async def search(q: str, limit: int = 20, video_id: Optional[str] = None):
+    # Which analyzed video mentions q, and where
+    index = get_search_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Search index disabled")
+    hits = await asyncio.to_thread(index.search, q, max(1, min(limit, 100)), video_id)
+    return {"query": q, "hits": hits}
+
+@app.post("/batch")
+async def analyze_batch(request: BatchRequest):
+    # URL lists and playlists; one NDJSON line per video as each finishes.
+    # Videos go through the job manager, so the worker pool pipelines them
+    # and cached or in-flight videos are not analyzed twice.
+    urls = await asyncio.to_thread(expand_playlists, request.urls, os.getenv("SCRAPERAPI_PROXY"))
+
+    async def analyze_one(url):
+        video_id = extract_video_id(url)
+        if not video_id:
+            return {"success": False, "error": "Invalid YouTube URL"}
+        job = jobs.submit(url, video_id)
+        await job.wait()
+        return job.result if job.result is not None else {"success": False, "error": job.error}
+
+    async def ndjson():
+        yield json.dumps({"event": "batch", "videos": len(urls)}) + "\n"
+        async for index, url, result in run_batch(urls, analyze_one, max(DEFAULT_MAX_IN_FLIGHT, pool.processes + 1)):
+            record = {"index": index, "url": url, "video_id": extract_video_id(url), "result": result}
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: AnalyzeRequest):
+    video_id = extract_video_id(request.url)
+    if not video_id:
+        raise HTTPException(status_code=400, detail="Invalid YouTube URL")
+    job = jobs.submit(request.url, video_id)
+    return {"job_id": job.id, "status": job.status}
+
+def _get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, include_result: bool = True):
+    return _get_job(job_id).snapshot(include_result)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, format: str = "ndjson", after: int = 0):
+    job = _get_job(job_id)
+
+    async def ndjson():
+        async for event in job.stream(after):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    async def sse():
+        async for event in job.stream(after):
+            yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+    if format == "sse":
+        return StreamingResponse(sse(), media_type="text/event-stream")
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
\ No newline at end of file
@@ -1,8 +1,8 @@
 import { NextResponse } from 'next/server';
-import { spawn } from 'child_process';
 import path from 'path';
 import fs from 'fs/promises';
 import os from 'os';
+import { getPythonWorker } from '@/lib/pythonWorker';
 
 const TEMP_DIR = path.join(process.cwd(), 'public', 'temp');
 
@@ -10,9 +10,10 @@ const PYTHON_COMMAND = os.platform() === 'win32'
   ? path.join(process.cwd(), 'venv', 'Scripts', 'python.exe')
   : '/usr/local/bin/python3.11';
 
-function cleanOutput(output: string): string {
-  const jsonMatch = output.match(/\{[\s\S]*\}/);
-  return jsonMatch ? jsonMatch[0] : output;
+interface AnalysisResult {
+  success: boolean;
+  error?: string;
+  transcript?: unknown[];
 }
 
 function extractVideoId(url: string): string {
@@ -54,77 +55,37 @@ export async function POST(req: Request): Promise<NextResponse> {
       throw new Error(`Python executable not found at: ${PYTHON_COMMAND}`);
     }
 
-    const pythonProcess = spawn(PYTHON_COMMAND, [scriptPath, url, videoId], {
-      env: {
-        ...process.env,
-        GROQ_API_KEY: process.env.GROQ_API_KEY,
-        PYTHONIOENCODING: 'utf-8',
-      },
+    const worker = getPythonWorker(PYTHON_COMMAND, scriptPath, {
+      ...process.env,
+      GROQ_API_KEY: process.env.GROQ_API_KEY,
+      PYTHONIOENCODING: 'utf-8',
     });
 
-    let output = '';
-    let error = '';
+    let analysisResult: AnalysisResult;
+    try {
+      analysisResult = await worker.request<AnalysisResult>({ url, video_id: videoId });
+    } catch (e) {
+      console.error('Python worker error:', e);
+      return NextResponse.json(
+        { error: `Failed to analyze video: ${e instanceof Error ? e.message : 'Unknown Python error'}` },
+        { status: 500 }
+      );
+    }
 
-    pythonProcess.stdout.on('data', (data) => {
-      const chunk = data.toString();
-      output += chunk;
-      console.log('Python stdout:', chunk);
-    });
+    if (!analysisResult.success) {
+      return NextResponse.json(
+        { error: analysisResult.error || 'Video analysis failed' },
+        { status: 400 }
+      );
+    }
 
-    pythonProcess.stderr.on('data', (data) => {
-      const chunk = data.toString();
-      error += chunk;
-      console.error('Python stderr:', chunk);
+    console.log('Transcript Data:', {
+      totalSegments: analysisResult.transcript?.length || 0,
+      firstSegment: analysisResult.transcript?.[0],
+      lastSegment: analysisResult.transcript?.[analysisResult.transcript.length - 1],
     });
 
-    return new Promise<NextResponse>((resolve) => {
-      pythonProcess.on('close', (code) => {
-        console.log('Raw Python output:', output);
-        console.log('Raw Python error:', error);
-        if (code !== 0) {
-          console.error('Python script error:', error);
-          resolve(
-            NextResponse.json(
-              { error: `Failed to analyze video: ${error || 'Unknown Python error'}` },
-              { status: 500 }
-            )
-          );
-          return;
-        }
-
-        try {
-          const cleanedOutput = cleanOutput(output);
-          console.log('Cleaned output:', cleanedOutput);
-          const analysisResult = JSON.parse(cleanedOutput);
-
-          if (!analysisResult.success) {
-            resolve(
-              NextResponse.json(
-                { error: analysisResult.error || 'Video analysis failed' },
-                { status: 400 }
-              )
-            );
-            return;
-          }
-
-          console.log('Transcript Data:', {
-            totalSegments: analysisResult.transcript?.length || 0,
-            firstSegment: analysisResult.transcript?.[0],
-            lastSegment: analysisResult.transcript?.[analysisResult.transcript.length - 1],
-          });
-
-          resolve(NextResponse.json(analysisResult));
-        } catch (e) {
-          console.error('Failed to parse analysis result:', e);
-          resolve(
-            NextResponse.json(
-              { error: `Failed to parse analysis result: ${e instanceof Error ? e.message : 'Unknown error'}` },
-              { status: 500 }
-            )
-          );
-        }
-      });
-    });
+    return NextResponse.json(analysisResult);
   } catch (error) {
     console.error('Error in analyze-video route:', error);
     return NextResponse.json(
@@ -1,6 +1,25 @@
 import { NextResponse } from 'next/server';
 import axios from 'axios';
 
+const PYTHON_API_URL = process.env.PYTHON_API_URL || 'http://localhost:8000';
+
+// Pick the transcript windows relevant to the question from the Python API,
+// falling back to the start of the transcript when it is unreachable.
+async function transcriptContext(question: string, video: { videoId?: string; transcript?: { text: string }[] }) {
+  const transcript = video.transcript || [];
+  try {
+    const { data } = await axios.post(
+      `${PYTHON_API_URL}/retrieve`,
+      { question, video_id: video.videoId, transcript, k: 6, max_tokens: 1500 },
+      { timeout: 5000 }
+    );
+    if (data.context) return data.context as string;
+  } catch (error) {
+    console.warn('Transcript retrieval unavailable, using transcript start:', error instanceof Error ? error.message : error);
+  }
+  return transcript.slice(0, 100).map((t) => t.text).join(' ');
+}
+
 export async function POST(req: Request) {
   try {
     const { question, video } = await req.json();
@@ -10,7 +29,9 @@ export async function POST(req: Request) {
       throw new Error('GROQ_API_KEY environment variable is not set');
     }
 
-    // Compose a prompt with explicit title, description, and more transcript
+    const context = await transcriptContext(question, video);
+
+    // Compose a prompt with explicit title, description, and the relevant transcript
     const prompt = `
 You are an expert video assistant.
 
@@ -20,15 +41,12 @@ ${video.metadata?.title || ''}
 Description:
 ${video.metadata?.description || ''}
 
-Metadata:
-${JSON.stringify(video.metadata, null, 2)}
-
 Video Uploader/ Channel: 
 ${video.metadata?.author || ''}
 ${video.metadata?.channel || ''}
 
-Transcript (partial):
-${video.transcript.slice(0, 100).map((t: { text: string }) => t.text).join(' ')}
+Transcript excerpts most relevant to the question ([start-end] timestamps):
+${context}
 
 Chapters:
 ${video.chapters.map((c: { title: string, summary: string }) => `${c.title}: ${c.summary}`).join('\n')}
@@ -117,6 +117,7 @@ export default function Home() {
         body: JSON.stringify({
           question: userMessage.content,
           video: {
+            videoId,
             metadata: transcript.length ? transcript[0].metadata : {},
             transcript,
             chapters,
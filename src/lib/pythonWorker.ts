@@ -0,0 +1,99 @@
+import { spawn, type ChildProcessWithoutNullStreams } from 'child_process';
+import readline from 'readline';
+
+// Protocol of `python <script> --serve`: one JSON object per line each way,
+// responses matched to requests by `id`.
+interface WorkerMessage {
+  id?: string | null;
+  type: 'ready' | 'result' | 'error' | 'pong';
+  result?: unknown;
+  error?: string;
+}
+
+interface Pending {
+  resolve: (value: unknown) => void;
+  reject: (reason: Error) => void;
+}
+
+class PythonWorker {
+  private child: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<string, Pending>();
+  private nextId = 0;
+
+  constructor(
+    private command: string,
+    private scriptPath: string,
+    private env: NodeJS.ProcessEnv,
+  ) {}
+
+  private start(): ChildProcessWithoutNullStreams {
+    console.log('Starting Python worker:', this.scriptPath);
+    const child = spawn(this.command, [this.scriptPath, '--serve'], { env: this.env });
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => this.onLine(line));
+    child.stderr.on('data', (data) => console.error('Python stderr:', data.toString()));
+    // Writes racing a crash fail with EPIPE; the exit handler rejects them
+    child.stdin.on('error', (err) => console.error('Python worker stdin error:', err.message));
+
+    const fail = (reason: string) => {
+      if (this.child !== child) return;
+      this.child = null;
+      const error = new Error(reason);
+      for (const pending of this.pending.values()) pending.reject(error);
+      this.pending.clear();
+    };
+    child.on('error', (err) => fail(`Python worker failed to start: ${err.message}`));
+    child.on('exit', (code, signal) => fail(`Python worker exited (${code ?? signal})`));
+
+    this.child = child;
+    return child;
+  }
+
+  private onLine(line: string) {
+    let message: WorkerMessage;
+    try {
+      message = JSON.parse(line);
+    } catch {
+      console.error('Unexpected Python worker output:', line);
+      return;
+    }
+    if (message.type === 'ready') {
+      console.log('Python worker ready:', this.scriptPath);
+      return;
+    }
+    const pending = message.id != null ? this.pending.get(message.id) : undefined;
+    if (!pending) {
+      if (message.type === 'error') console.error('Python worker error:', message.error);
+      return;
+    }
+    this.pending.delete(message.id as string);
+    if (message.type === 'error') {
+      pending.reject(new Error(message.error || 'Unknown Python error'));
+    } else {
+      pending.resolve(message.result);
+    }
+  }
+
+  request<T>(payload: Record<string, unknown>): Promise<T> {
+    const child = this.child ?? this.start();
+    const id = String(++this.nextId);
+    return new Promise<T>((resolve, reject) => {
+      this.pending.set(id, { resolve: resolve as (value: unknown) => void, reject });
+      child.stdin.write(JSON.stringify({ ...payload, id }) + '\n');
+    });
+  }
+}
+
+// Kept on globalThis so dev-mode module reloads reuse the running worker
+const globalForWorkers = globalThis as unknown as { pythonWorkers?: Map<string, PythonWorker> };
+
+export function getPythonWorker(command: string, scriptPath: string, env: NodeJS.ProcessEnv): PythonWorker {
+  const workers = (globalForWorkers.pythonWorkers ??= new Map());
+  const key = `${command} ${scriptPath}`;
+  let worker = workers.get(key);
+  if (!worker) {
+    worker = new PythonWorker(command, scriptPath, env);
+    workers.set(key, worker);
+  }
+  return worker;
+}